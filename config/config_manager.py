@@ -239,6 +239,7 @@ class NovelConfig(BaseModel):
     default_chapter_count: int = Field(default=20, description="默认章节数")
     default_word_count: int = Field(default=2000, description="默认章节字数")
     max_characters: int = Field(default=50, description="最大角色数")
+    concurrent_chapters: int = Field(default=3, description="每批并发生成的章节数")
     cache_generated_content: bool = Field(default=True, description="缓存生成内容")
 
     # 集成增强生成配置
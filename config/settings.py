@@ -22,6 +22,8 @@ class LLMConfig(BaseSettings):
     temperature: float = Field(default=0.7, description="温度参数")
     timeout: int = Field(default=60, description="请求超时时间")
     retry_times: int = Field(default=3, description="重试次数")
+    max_concurrent_requests: int = Field(default=4, description="并发LLM请求上限")
+    requests_per_second: float = Field(default=0.0, description="每秒LLM请求上限，0表示不限速")
     # 新增角色生成专用配置
     character_generation: dict = Field(default_factory=lambda: {
         "max_tokens": 8000,  # 角色生成专用token限制
@@ -6,6 +6,7 @@ import asyncio
 import functools
 import hashlib
 import json
+import sys
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
@@ -16,9 +17,13 @@ from pydantic import BaseModel, Field
 from loguru import logger
 
 
-@dataclass
+# Python 3.10+ 为高频创建的数据类启用__slots__，省去每个实例的__dict__
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ToolCall:
-    """工具调用信息"""
+    """工具调用信息（创建后不可修改）"""
     id: str
     name: str
     parameters: Dict[str, Any]
@@ -117,14 +122,14 @@ class BaseTool(ABC):
                            context: Optional[Dict[str, Any]] = None) -> ToolResponse:
         """安全执行工具"""
         call_id = f"{self.definition.name}_{int(time.time() * 1000)}"
-        start_time = time.time()
+        start_time = time.monotonic()
 
         try:
             await self.pre_execute(parameters, context)
             result = await self.execute(parameters, context)
             result = await self.post_execute(result, parameters)
 
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
 
             return ToolResponse(
                 id=call_id,
@@ -139,7 +144,7 @@ class BaseTool(ABC):
             # 尝试错误处理
             error_result = await self.on_error(e, parameters)
 
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
 
             return ToolResponse(
                 id=call_id,
@@ -156,14 +161,14 @@ class AsyncTool(BaseTool):
                            context: Optional[Dict[str, Any]] = None) -> ToolResponse:
         """安全执行工具"""
         call_id = f"{self.definition.name}_{int(time.time() * 1000)}"
-        start_time = time.time()
+        start_time = time.monotonic()
 
         try:
             await self.pre_execute(parameters, context)
             result = await self.execute(parameters, context)
             result = await self.post_execute(result, parameters)
 
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
 
             return ToolResponse(
                 id=call_id,
@@ -173,7 +178,7 @@ class AsyncTool(BaseTool):
             )
 
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
             error_result = await self.on_error(e, parameters)
 
             return ToolResponse(
@@ -0,0 +1,98 @@
+# core/json_utils.py
+"""
+JSON工具
+优先使用orjson加速序列化/解析，未安装时回退到标准库json
+"""
+
+import json
+from dataclasses import asdict, is_dataclass
+from datetime import date
+from enum import Enum
+from typing import Any, BinaryIO
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+
+def extract_json_block(text: str, open_char: str = "{", close_char: str = "}") -> str:
+    """从LLM响应中截取第一个开括号到最后一个闭括号之间的JSON文本
+
+    LLM经常在JSON前后附带说明文字，这里单次扫描截取，找不到时返回空字符串
+    """
+    if not text:
+        return ""
+
+    start = text.find(open_char)
+    end = text.rfind(close_char)
+    if start < 0 or end <= start:
+        return ""
+
+    return text[start:end + 1]
+
+
+def _default(obj: Any) -> Any:
+    """标准库回退路径下序列化数据类、枚举与日期（orjson原生支持）"""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, date):  # datetime 是 date 的子类
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _orjson_option(indent: bool) -> int:
+    """orjson选项：与标准库一致，允许非字符串键"""
+    return orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+
+
+def loads(data: Any) -> Any:
+    """解析JSON（支持str/bytes）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """序列化为JSON字符串（保留中文）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_orjson_option(indent)).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None, default=_default)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """序列化为UTF-8编码的JSON字节串（保留中文）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_orjson_option(indent))
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None,
+                      default=_default).encode("utf-8")
+
+
+def dump(obj: Any, fp: BinaryIO, indent: bool = False) -> None:
+    """序列化并写入以二进制模式打开的文件
+
+    orjson一次性生成bytes直接写入；标准库按块编码写入，不在内存中拼出完整字符串
+    """
+    if orjson is not None:
+        fp.write(orjson.dumps(obj, option=_orjson_option(indent)))
+        return
+
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=2 if indent else None,
+                               default=_default)
+    for chunk in encoder.iterencode(obj):
+        fp.write(chunk.encode("utf-8"))
+
+
+def loads_llm_json(text: str, open_char: str = "{", close_char: str = "}") -> Any:
+    """解析LLM响应中的JSON，无法提取或解析失败时返回None"""
+    block = extract_json_block(text, open_char, close_char)
+    if not block:
+        return None
+
+    try:
+        return loads(block)
+    except ValueError:
+        # orjson.JSONDecodeError 与 json.JSONDecodeError 均为 ValueError 子类
+        return None
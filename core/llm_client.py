@@ -6,12 +6,15 @@ LLM客户端封装
 
 import asyncio
 import json
+import weakref
 from typing import Dict, List, Optional, Union, AsyncGenerator, Callable
 from dataclasses import dataclass
 from openai import AsyncOpenAI
 from loguru import logger
 import time
 from config.settings import get_settings
+from core import json_utils
+from core.rate_limiter import AsyncRateLimiter
 
 
 @dataclass
@@ -44,6 +47,28 @@ class LLMClient:
             timeout=self.config.timeout
         )
         self.retry_count = 0
+        # 并发请求上限，同一事件循环内的调用方共享；信号量会绑定到事件循环，
+        # 按循环分别创建，服务单例跨多次 asyncio.run 使用时也不会失效
+        self._request_semaphores = weakref.WeakKeyDictionary()
+        # 请求速率上限（令牌桶），未配置时不限速
+        self._rate_limiter: Optional[AsyncRateLimiter] = (
+            AsyncRateLimiter(self.config.requests_per_second)
+            if self.config.requests_per_second > 0 else None
+        )
+
+    async def _wait_for_rate_limit(self) -> None:
+        """配置了速率上限时等待令牌，否则立即返回"""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire()
+
+    def _get_request_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环中限制并发请求数的信号量"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._request_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._request_semaphores[loop] = asyncio.Semaphore(
+                self.config.max_concurrent_requests)
+        return semaphore
 
     async def chat_completion(
         self,
@@ -85,7 +110,7 @@ class LLMClient:
         if function_call:
             request_params["function_call"] = function_call
 
-        start_time = time.time()
+        start_time = time.monotonic()
 
         try:
             if stream:
@@ -108,9 +133,11 @@ class LLMClient:
 
     async def _single_completion(self, params: Dict, start_time: float) -> LLMResponse:
         """单次完整响应"""
-        response = await self.client.chat.completions.create(**params)
+        async with self._get_request_semaphore():
+            await self._wait_for_rate_limit()
+            response = await self.client.chat.completions.create(**params)
 
-        end_time = time.time()
+        end_time = time.monotonic()
         response_time = end_time - start_time
 
         choice = response.choices[0]
@@ -125,11 +152,14 @@ class LLMClient:
 
     async def _stream_completion(self, params: Dict, start_time: float) -> AsyncGenerator[str, None]:
         """流式响应"""
-        stream = await self.client.chat.completions.create(**params)
+        # 流式连接在读取完毕前一直占用并发名额
+        async with self._get_request_semaphore():
+            await self._wait_for_rate_limit()
+            stream = await self.client.chat.completions.create(**params)
 
-        async for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
 
 class PromptTemplate:
@@ -221,7 +251,7 @@ class FunctionCallHandler:
             else:
                 result = func(**args_dict)
 
-            return json.dumps(result, ensure_ascii=False) if not isinstance(result, str) else result
+            return json_utils.dumps(result) if not isinstance(result, str) else result
 
         except Exception as e:
             logger.error(f"函数调用失败 {name}: {e}")
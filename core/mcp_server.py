@@ -5,7 +5,6 @@ MCP服务器实现
 """
 
 import asyncio
-import json
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
@@ -17,10 +16,14 @@ from loguru import logger
 from pydantic import BaseModel, Field
 
 from config.settings import get_settings
+from core import json_utils
 from core.base_tools import  ToolCall
 from core.llm_client import get_llm_service
 from core.tool_registry import ToolRegistry
 
+# 流式响应结束事件，内容固定，无需每次序列化
+_SSE_DONE_EVENT = 'data: {"done": true}\n\n'
+
 
 class MCPRequest(BaseModel):
     """MCP请求基类"""
@@ -284,9 +287,9 @@ class MCPServer:
         )
 
         async for chunk in stream:
-            yield f"data: {json.dumps({'content': chunk}, ensure_ascii=False)}\n\n"
+            yield f"data: {json_utils.dumps({'content': chunk})}\n\n"
 
-        yield f"data: {json.dumps({'done': True}, ensure_ascii=False)}\n\n"
+        yield _SSE_DONE_EVENT
 
     async def _detect_tool_calls(self, message: str) -> List[ToolCall]:
         """检测消息中是否需要调用工具"""
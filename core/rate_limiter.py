@@ -0,0 +1,59 @@
+# core/rate_limiter.py
+"""
+异步限流器
+基于令牌桶限制请求速率，只在真正超过速率上限时等待
+"""
+
+import asyncio
+import time
+import weakref
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """异步令牌桶限流器
+
+    每秒补充 rate 个令牌，桶容量为 capacity（默认与 rate 相同，至少为1）。
+    令牌充足时立即放行，不足时按缺口等待，等待者按到达顺序依次获得令牌
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # 锁会绑定到事件循环，按循环分别创建；循环结束后随之释放
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _get_lock(self) -> asyncio.Lock:
+        """获取当前事件循环对应的锁"""
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def acquire(self) -> None:
+        """获取一个令牌，必要时等待"""
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        return False
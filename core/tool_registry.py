@@ -3,6 +3,7 @@
 完整的工具注册中心实现
 提供工具管理、执行、监控等功能
 """
+import sys
 import time
 import asyncio
 from typing import Dict, List, Optional, Callable, Any
@@ -72,11 +73,14 @@ class ToolRegistry:
         }
 
         # 启动时间
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
 
         # 工具依赖关系
         self.dependencies: Dict[str, List[str]] = {}
 
+        # 注册表版本号，工具增删时递增，供调用方判断缓存是否失效
+        self.version = 0
+
         logger.info("🔧 工具注册中心已初始化")
 
     def add_hook(self, hook_type: str, func: Callable):
@@ -90,7 +94,8 @@ class ToolRegistry:
     def register(self, tool: BaseTool, aliases: List[str] = None):
         """注册工具"""
         definition = tool.definition
-        tool_name = definition.name
+        # 驻留工具名，后续按名称查找的字典比较可走指针相等的快速路径
+        tool_name = sys.intern(definition.name)
 
         # 执行注册前钩子
         for hook in self.hooks["before_register"]:
@@ -116,11 +121,13 @@ class ToolRegistry:
             for alias in aliases:
                 if alias in self.aliases:
                     logger.warning(f"别名冲突，将覆盖: {alias}")
-                self.aliases[alias] = tool_name
+                self.aliases[sys.intern(alias)] = tool_name
 
         # 初始化统计
         self.execution_stats[tool_name] = ToolExecutionStats(tool_name=tool_name)
 
+        self.version += 1
+
         # 执行注册后钩子
         for hook in self.hooks["after_register"]:
             try:
@@ -156,6 +163,8 @@ class ToolRegistry:
             if tool_name in self.execution_stats:
                 del self.execution_stats[tool_name]
 
+            self.version += 1
+
             logger.info(f"❌ 工具已注销: {tool_name}")
         else:
             logger.warning(f"工具不存在: {tool_name}")
@@ -188,6 +197,20 @@ class ToolRegistry:
 
         return sorted(tools, key=lambda t: t.name)
 
+    def list_by_category(self, include_hidden: bool = False) -> Dict[str, List[ToolDefinition]]:
+        """按类别分组列出工具（单次遍历所有工具）"""
+        grouped: Dict[str, List[ToolDefinition]] = {category: [] for category in self.categories}
+        for tool in self.tools.values():
+            definition = tool.definition
+            if not include_hidden and definition.name.startswith('_'):
+                continue
+            grouped.setdefault(definition.category, []).append(definition)
+
+        for tools in grouped.values():
+            tools.sort(key=lambda t: t.name)
+
+        return grouped
+
     def list_categories(self) -> List[str]:
         """列出所有类别"""
         return sorted(list(self.categories.keys()))
@@ -264,9 +287,9 @@ class ToolRegistry:
                 logger.error(f"执行前钩子失败: {e}")
 
         # 执行工具
-        start_time = time.time()
+        start_time = time.monotonic()
         response = await tool.safe_execute(tool_call.parameters, context)
-        execution_time = time.time() - start_time
+        execution_time = time.monotonic() - start_time
 
         # 更新统计
         stats.total_execution_time += execution_time
@@ -328,7 +351,7 @@ class ToolRegistry:
     def get_stats(self) -> RegistryStats:
         """获取注册表统计信息"""
         category_counts = {cat: len(tools) for cat, tools in self.categories.items()}
-        uptime = time.time() - self.start_time
+        uptime = time.monotonic() - self.start_time
 
         return RegistryStats(
             total_tools=len(self.tools),
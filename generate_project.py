@@ -66,6 +66,8 @@ redis>=4.0.0
 aiofiles>=23.0.0
 loguru>=0.7.0
 psutil>=5.9.0
+orjson>=3.8.0
+uvloop>=0.17.0; sys_platform != "win32"
 '''
 
     files["requirements-dev.txt"] = '''pytest>=7.0.0
@@ -191,6 +193,8 @@ class LLMConfig(BaseSettings):
     max_tokens: int = Field(default=4000)
     temperature: float = Field(default=0.7)
     timeout: int = Field(default=60)
+    max_concurrent_chapters: int = Field(default=3)
+    hedge_chapters: bool = Field(default=False)  # 对冲请求会额外消耗token，默认关闭
 
 
 class DatabaseConfig(BaseSettings):
@@ -297,9 +301,13 @@ class LLMService:
         return await self.client.chat_completion(messages)
 
 
-_llm_service = LLMService()
+_llm_service: Optional[LLMService] = None
 
 def get_llm_service() -> LLMService:
+    """获取LLM服务（首次调用时创建，之后复用同一实例）"""
+    global _llm_service
+    if _llm_service is None:
+        _llm_service = LLMService()
     return _llm_service
 '''
 
@@ -312,10 +320,15 @@ from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field
 from datetime import datetime
 import asyncio
+import sys
 from pydantic import BaseModel, Field
 
 
-@dataclass
+# Python 3.10+ 启用__slots__，省去每次章节调用实例的__dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class ToolCall:
     id: str
     name: str
@@ -363,12 +376,12 @@ class BaseTool(ABC):
 class AsyncTool(BaseTool):
     async def safe_execute(self, parameters: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> ToolResponse:
         import time
-        start_time = time.time()
+        start_time = time.monotonic()
         call_id = f"{self.definition.name}_{int(time.time() * 1000)}"
 
         try:
             result = await self.execute(parameters, context)
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
 
             return ToolResponse(
                 id=call_id,
@@ -377,7 +390,7 @@ class AsyncTool(BaseTool):
                 execution_time=execution_time
             )
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.monotonic() - start_time
             return ToolResponse(
                 id=call_id,
                 success=False,
@@ -785,7 +798,8 @@ class ChapterWriter:
     def __init__(self):
         self.llm_service = get_llm_service()
 
-    async def write_chapter(self, chapter_info: Dict[str, Any], target_word_count: int = 2000) -> ChapterContent:
+    async def write_chapter(self, chapter_info: Dict[str, Any], target_word_count: int = 2000,
+                            story_context: str = "") -> ChapterContent:
         chapter_number = chapter_info.get("number", 1)
         title = chapter_info.get("title", f"第{chapter_number}章")
         summary = chapter_info.get("summary", "章节内容")
@@ -797,6 +811,10 @@ class ChapterWriter:
 
         请写作完整的章节内容，包含对话、描述和情节发展。"""
 
+        if story_context:
+            # 共享背景放在最前面，同一部小说各章节的提示词前缀一致，便于服务端复用前缀缓存
+            prompt = f"故事背景：\\n{story_context}\\n\\n{prompt}"
+
         response = await self.llm_service.generate_text(prompt)
         content = response.content
 
@@ -832,6 +850,13 @@ class ChapterWriterTool(AsyncTool):
                     description="目标字数",
                     required=False,
                     default=2000
+                ),
+                ToolParameter(
+                    name="story_context",
+                    type="string",
+                    description="各章节共享的故事背景（世界观、角色）",
+                    required=False,
+                    default=""
                 )
             ],
             tags=["writing", "chapter"]
@@ -840,8 +865,9 @@ class ChapterWriterTool(AsyncTool):
     async def execute(self, parameters: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         chapter_info = parameters.get("chapter_info", {})
         target_word_count = parameters.get("target_word_count", 2000)
+        story_context = parameters.get("story_context", "")
 
-        chapter = await self.writer.write_chapter(chapter_info, target_word_count)
+        chapter = await self.writer.write_chapter(chapter_info, target_word_count, story_context)
 
         return {
             "chapter": {
@@ -862,62 +888,192 @@ Fantasy Novel MCP 主程序
 
 import asyncio
 import argparse
+import hashlib
 import json
+import os
+import shutil
+import sys
+import tempfile
+import time
 from pathlib import Path
+from typing import Optional
 
 from loguru import logger
 from config.settings import get_settings
-from core.mcp_server import get_mcp_server
-from core.llm_client import get_llm_service
 from core.base_tools import get_tool_registry, ToolCall
 
-# 注册工具
-from modules.worldbuilding import register_worldbuilding_tools
-from modules.character import register_character_tools
-from modules.writing import register_writing_tools
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+
+# 生成结果输出目录
+OUTPUT_DIR = Path("data/generated")
+
+# 世界观/角色生成结果的磁盘缓存目录
+CACHE_DIR = Path("data/cache")
+# 缓存条目的有效期（秒）与最多保留的条目数
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+CACHE_MAX_ENTRIES = 200
+
+# 章节调度：不超过该章节数时串行生成
+SERIAL_CHAPTER_LIMIT = 2
+# 单章耗时超过平均耗时的该倍数时发起对冲请求
+HEDGE_LATENCY_FACTOR = 2.0
+LATENCY_EMA_ALPHA = 0.3
+
+# 简单模式下的章节参数
+CHAPTER_WORD_COUNT = 1500
+CHAPTER_TITLE_TEMPLATE = "第{}章"
+CHAPTER_SUMMARY_TEMPLATE = "第{}章的精彩内容"
+
+
+def _json_bytes(obj) -> bytes:
+    """序列化为带缩进的UTF-8 JSON字节串（保留中文）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _print_json(obj):
+    """以缩进JSON输出到标准输出（直接写入字节，跳过print的编码往返）"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(_json_bytes(obj) + b"\\n")
+    sys.stdout.buffer.flush()
+
+
+def _concat_files(target: Path, header: bytes, sources: list):
+    """写入文件头后按顺序拼接各分片文件"""
+    with open(target, "wb") as out:
+        out.write(header)
+        for source in sources:
+            with open(source, "rb") as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+
+
+def _cache_path(kind: str, params: dict) -> Path:
+    """按参数内容计算缓存文件路径"""
+    key = hashlib.blake2b(
+        json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return CACHE_DIR / f"{kind}_{key}.json"
+
+
+def _prune_cache():
+    """删除过期的缓存条目，并只保留最新的 CACHE_MAX_ENTRIES 个"""
+    try:
+        entries = sorted(((path.stat().st_mtime, path)
+                          for path in CACHE_DIR.glob("*.json")), reverse=True)
+        now = time.time()
+        for index, (mtime, path) in enumerate(entries):
+            if index >= CACHE_MAX_ENTRIES or now - mtime > CACHE_TTL_SECONDS:
+                path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"清理缓存失败: {e}")
+
+
+def _write_atomic(path: Path, data: bytes):
+    """先写临时文件再替换，避免中断时留下不完整的缓存"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
 
 
 class NovelGenerator:
-    def __init__(self):
+    # 工具注册在进程内只需执行一次
+    _tools_registered = False
+
+    def __init__(self, use_cache: bool = True):
+        self.use_cache = use_cache
         self.settings = get_settings()
-        self.llm_service = get_llm_service()
         self.tool_registry = get_tool_registry()
-        self.mcp_server = get_mcp_server()
+        self.mcp_server = None  # 仅在启动服务器时创建
+        self._chapter_latency_ema: Optional[float] = None  # 单章生成耗时的指数滑动平均
 
         # 注册工具
         self._register_tools()
 
+        if use_cache:
+            _prune_cache()
+
     def _register_tools(self):
+        if NovelGenerator._tools_registered:
+            return
+
+        # 延迟导入各工具模块，--help 等命令无需加载
+        from modules.worldbuilding import register_worldbuilding_tools
+        from modules.character import register_character_tools
+        from modules.writing import register_writing_tools
+
         logger.info("注册工具...")
         register_worldbuilding_tools()
         register_character_tools()
         register_writing_tools()
-        logger.info(f"已注册 {len(self.tool_registry.tools)} 个工具")
+        NovelGenerator._tools_registered = True
+        logger.opt(lazy=True).info("已注册 {} 个工具", lambda: len(self.tool_registry.tools))
+
+    async def _load_cached(self, kind: str, params: dict):
+        """读取缓存结果，未命中返回None"""
+        if not self.use_cache:
+            return None
+
+        path = _cache_path(kind, params)
+        try:
+            if time.time() - path.stat().st_mtime > CACHE_TTL_SECONDS:
+                return None  # 已过期，重新生成后覆盖
+        except FileNotFoundError:
+            return None
+
+        try:
+            data = await asyncio.to_thread(path.read_bytes)
+            logger.debug(f"命中缓存: {path.name}")
+            return orjson.loads(data) if orjson is not None else json.loads(data)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取缓存失败，重新生成: {e}")
+            return None
+
+    async def _store_cached(self, kind: str, params: dict, result):
+        """写入缓存结果"""
+        if self.use_cache:
+            await asyncio.to_thread(_write_atomic, _cache_path(kind, params), _json_bytes(result))
 
     async def generate_world_only(self, genre: str = "玄幻", theme: str = "修仙"):
         """生成世界观"""
+        params = {"genre": genre, "theme": theme}
+        cached = await self._load_cached("world", params)
+        if cached is not None:
+            return cached
+
         call = ToolCall(
             id="world_gen",
             name="world_builder",
-            parameters={"genre": genre, "theme": theme}
+            parameters=params
         )
 
         response = await self.tool_registry.execute_tool(call)
         if response.success:
+            await self._store_cached("world", params, response.result)
             return response.result
         else:
             raise Exception(f"世界观生成失败: {response.error}")
 
     async def generate_character_only(self, character_type: str = "主角", genre: str = "玄幻"):
         """生成角色"""
+        params = {"character_type": character_type, "genre": genre}
+        cached = await self._load_cached("character", params)
+        if cached is not None:
+            return cached
+
         call = ToolCall(
             id="char_gen",
             name="character_creator",
-            parameters={"character_type": character_type, "genre": genre}
+            parameters=params
         )
 
         response = await self.tool_registry.execute_tool(call)
         if response.success:
+            await self._store_cached("character", params, response.result)
             return response.result
         else:
             raise Exception(f"角色生成失败: {response.error}")
@@ -926,40 +1082,91 @@ class NovelGenerator:
         """生成简单小说"""
         logger.info(f"开始生成小说《{title}》...")
 
-        # 1. 生成世界观
-        logger.info("生成世界观...")
-        world_result = await self.generate_world_only(genre)
-
-        # 2. 生成主角
-        logger.info("生成主角...")
-        char_result = await self.generate_character_only("主角", genre)
+        # 1-2. 世界观与主角互不依赖，并发生成
+        logger.info("生成世界观与主角...")
+        world_result, char_result = await asyncio.gather(
+            self.generate_world_only(genre),
+            self.generate_character_only("主角", genre)
+        )
 
-        # 3. 生成章节
+        # 3. 生成章节：章节很少时串行，否则并发（信号量限制同时进行的LLM请求数）
         logger.info("生成章节...")
-        chapter_contents = []
-
-        for i in range(1, chapters + 1):
-            chapter_info = {
-                "number": i,
-                "title": f"第{i}章",
-                "summary": f"第{i}章的精彩内容"
-            }
+        if chapters <= SERIAL_CHAPTER_LIMIT:
+            concurrency = 1
+        else:
+            concurrency = self.settings.llm.max_concurrent_chapters
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def write_chapter(i: int, call: ToolCall):
+            async with semaphore:
+                try:
+                    return i, await self._execute_chapter_call(call, semaphore)
+                except Exception as e:
+                    return i, e
+
+        # 世界观与主角信息只序列化一次，作为所有章节共享的提示词前缀
+        story_context = _json_bytes({
+            "world_setting": world_result["world_setting"],
+            "main_character": char_result["character"]
+        }).decode("utf-8")
 
-            call = ToolCall(
+        calls = [
+            ToolCall(
                 id=f"chapter_{i}",
-                name="chapter_writer", 
+                name="chapter_writer",
                 parameters={
-                    "chapter_info": chapter_info,
-                    "target_word_count": 1500
+                    "chapter_info": {
+                        "number": i,
+                        "title": CHAPTER_TITLE_TEMPLATE.format(i),
+                        "summary": CHAPTER_SUMMARY_TEMPLATE.format(i)
+                    },
+                    "target_word_count": CHAPTER_WORD_COUNT,
+                    "story_context": story_context
                 }
             )
-
-            response = await self.tool_registry.execute_tool(call)
-            if response.success:
-                chapter_contents.append(response.result["chapter"])
-                logger.info(f"完成第{i}章")
+            for i in range(1, chapters + 1)
+        ]
+
+        # 每完成一章立即落盘，中途失败时已完成的章节不会丢失；
+        # 每次运行使用独立的分片目录，标题不参与路径拼接
+        parts_root = OUTPUT_DIR / "_parts"
+        parts_root.mkdir(parents=True, exist_ok=True)  # 同时创建了OUTPUT_DIR
+        parts_dir = Path(tempfile.mkdtemp(prefix="novel_", dir=parts_root))
+        logger.debug("章节分片目录: {}", parts_dir)
+
+        # 按章节序号预留位置，完成后直接回填，无需再排序
+        finished: list = [None] * chapters
+        for future in asyncio.as_completed(
+            [write_chapter(i, call) for i, call in enumerate(calls, 1)]
+        ):
+            i, response = await future
+            if isinstance(response, Exception):
+                logger.error("第{}章生成失败: {}", i, response)
+            elif response.success:
+                chapter = response.result["chapter"]
+                finished[i - 1] = chapter
+                chapter_text = (f"{chapter['title']}\\n" + "-"*30 + "\\n"
+                                + chapter['content'] + "\\n\\n")
+                await asyncio.gather(
+                    asyncio.to_thread((parts_dir / f"ch{i:03d}.json").write_bytes,
+                                      _json_bytes(chapter)),
+                    asyncio.to_thread((parts_dir / f"ch{i:03d}.txt").write_bytes,
+                                      chapter_text.encode("utf-8"))
+                )
+                logger.info("完成第{}章", i)
             else:
-                logger.error(f"第{i}章生成失败: {response.error}")
+                logger.error("第{}章生成失败: {}", i, response.error)
+
+        # 单次遍历：去掉生成失败的空位，同时累计总字数并收集TXT分片
+        chapter_contents = []
+        shard_paths = []
+        total_words = 0
+        for i, chapter in enumerate(finished, 1):
+            if chapter is None:
+                continue
+            chapter_contents.append(chapter)
+            shard_paths.append(parts_dir / f"ch{i:03d}.txt")
+            total_words += chapter["word_count"]
 
         # 组装结果
         novel_data = {
@@ -968,36 +1175,100 @@ class NovelGenerator:
             "world_setting": world_result["world_setting"],
             "main_character": char_result["character"],
             "chapters": chapter_contents,
-            "total_words": sum(ch["word_count"] for ch in chapter_contents)
+            "total_words": total_words
         }
 
-        # 保存文件
-        output_dir = Path("data/generated")
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # 保存文件（输出目录已在创建分片目录时建好）
+        output_dir = OUTPUT_DIR
 
-        # JSON格式
-        with open(output_dir / f"{title}.json", "w", encoding="utf-8") as f:
-            json.dump(novel_data, f, ensure_ascii=False, indent=2)
+        json_blob = _json_bytes(novel_data)
+        txt_header = (f"《{title}》\\n类型：{genre}\\n总字数：{total_words}\\n"
+                      + "="*50 + "\\n\\n").encode("utf-8")
 
-        # TXT格式
-        with open(output_dir / f"{title}.txt", "w", encoding="utf-8") as f:
-            f.write(f"《{title}》\\n")
-            f.write(f"类型：{genre}\\n")
-            f.write(f"总字数：{novel_data['total_words']}\\n")
-            f.write("="*50 + "\\n\\n")
-
-            for chapter in chapter_contents:
-                f.write(f"{chapter['title']}\\n")
-                f.write("-"*30 + "\\n")
-                f.write(chapter['content'])
-                f.write("\\n\\n")
+        # 两个文件在线程中并发写入，TXT由章节分片顺序拼接，无需在内存中拼出全文
+        await asyncio.gather(
+            asyncio.to_thread((output_dir / f"{title}.json").write_bytes, json_blob),
+            asyncio.to_thread(_concat_files, output_dir / f"{title}.txt", txt_header, shard_paths)
+        )
+        # 最终文件写入完成后分片不再需要；只删除分片根目录下本次运行创建的目录
+        if parts_dir.resolve().parent == parts_root.resolve():
+            await asyncio.to_thread(shutil.rmtree, parts_dir, ignore_errors=True)
 
         logger.info(f"小说生成完成！文件保存在: {output_dir}")
         return novel_data
 
+    async def _execute_chapter_call(self, call: ToolCall, semaphore: asyncio.Semaphore):
+        """执行章节生成调用，耗时明显超过平均水平时发起对冲请求，取先成功的结果
+
+        调用方已为主请求占用 semaphore 的一个名额；对冲请求另占一个名额，
+        且只在有空闲名额时发起，不突破并发上限
+        """
+        start_time = time.monotonic()
+        primary = asyncio.ensure_future(self.tool_registry.execute_tool(call))
+
+        ema = self._chapter_latency_ema
+        if not self.settings.llm.hedge_chapters or ema is None:
+            response = await primary
+        else:
+            hedge_after = ema * HEDGE_LATENCY_FACTOR
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                response = primary.result()
+            elif semaphore.locked():
+                # 没有空闲名额，继续等待主请求
+                response = await primary
+            else:
+                logger.debug("章节 {} 耗时超过 {:.1f} 秒，发起对冲请求", call.id, hedge_after)
+                hedge = asyncio.ensure_future(self._execute_hedge(call, semaphore))
+                response = await self._first_successful(primary, hedge)
+
+        if response.success:
+            elapsed = time.monotonic() - start_time
+            self._chapter_latency_ema = elapsed if ema is None else (
+                LATENCY_EMA_ALPHA * elapsed + (1 - LATENCY_EMA_ALPHA) * ema
+            )
+        return response
+
+    async def _execute_hedge(self, call: ToolCall, semaphore: asyncio.Semaphore):
+        """占用一个并发名额发起对冲请求"""
+        async with semaphore:
+            return await self.tool_registry.execute_tool(
+                ToolCall(id=f"{call.id}_hedge", name=call.name, parameters=call.parameters)
+            )
+
+    @staticmethod
+    async def _first_successful(*tasks):
+        """等待多个相同请求，返回第一个成功的响应并取消其余请求"""
+        pending = set(tasks)
+        response = None
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        last_error = asyncio.CancelledError()
+                        continue
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    response = task.result()
+                    if response.success:
+                        return response
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if response is None:
+            raise last_error
+        return response
+
     def start_server(self, host: str = None, port: int = None, debug: bool = None):
         """启动服务器"""
+        from core.mcp_server import get_mcp_server
+
         logger.info("启动MCP服务器...")
+        self.mcp_server = get_mcp_server()
         self.mcp_server.run(host, port, debug)
 
     def list_tools(self):
@@ -1008,71 +1279,112 @@ class NovelGenerator:
             print(f"  - {tool.name}: {tool.description}")
 
 
-async def main():
-    parser = argparse.ArgumentParser(description="Fantasy Novel MCP")
-    subparsers = parser.add_subparsers(dest="command")
+async def _do_generate(generator: NovelGenerator, args):
+    """生成小说"""
+    novel = await generator.generate_simple_novel(
+        args.title, args.genre, args.chapters
+    )
+    print(f"✅ 小说《{novel['title']}》生成完成！")
+    print(f"   总字数: {novel['total_words']}")
+    print(f"   章节数: {len(novel['chapters'])}")
 
-    # 生成小说
-    gen_parser = subparsers.add_parser("generate", help="生成小说")
-    gen_parser.add_argument("--title", required=True, help="小说标题")
-    gen_parser.add_argument("--genre", default="玄幻", help="小说类型")
-    gen_parser.add_argument("--chapters", type=int, default=3, help="章节数")
 
-    # 生成世界观
-    world_parser = subparsers.add_parser("world", help="生成世界观")
-    world_parser.add_argument("--genre", default="玄幻", help="类型")
-    world_parser.add_argument("--theme", default="修仙", help="主题")
+async def _do_world(generator: NovelGenerator, args):
+    """生成世界观"""
+    result = await generator.generate_world_only(args.genre, args.theme)
+    _print_json(result)
 
-    # 生成角色
-    char_parser = subparsers.add_parser("character", help="生成角色")
-    char_parser.add_argument("--type", default="主角", help="角色类型")
-    char_parser.add_argument("--genre", default="玄幻", help="小说类型")
 
-    # 启动服务器
-    server_parser = subparsers.add_parser("server", help="启动服务器")
-    server_parser.add_argument("--host", default=None)
-    server_parser.add_argument("--port", type=int, default=None)
-    server_parser.add_argument("--debug", action="store_true")
+async def _do_character(generator: NovelGenerator, args):
+    """生成角色"""
+    result = await generator.generate_character_only(args.type, args.genre)
+    _print_json(result)
 
-    # 列出工具
-    subparsers.add_parser("tools", help="列出工具")
 
-    args = parser.parse_args()
+async def _do_server(generator: NovelGenerator, args):
+    """启动服务器"""
+    generator.start_server(args.host, args.port, args.debug)
 
-    if not args.command:
-        parser.print_help()
-        return
 
-    generator = NovelGenerator()
+async def _do_tools(generator: NovelGenerator, args):
+    """列出工具"""
+    generator.list_tools()
+
+
+def _add_generate_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--title", required=True, help="小说标题")
+    parser.add_argument("--genre", default="玄幻", help="小说类型")
+    parser.add_argument("--chapters", type=int, default=3, help="章节数")
+
+
+def _add_world_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--genre", default="玄幻", help="类型")
+    parser.add_argument("--theme", default="修仙", help="主题")
+
+
+def _add_character_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--type", default="主角", help="角色类型")
+    parser.add_argument("--genre", default="玄幻", help="小说类型")
+
+
+def _add_server_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--debug", action="store_true")
+
+
+# 子命令 -> (帮助信息, 参数配置函数, 处理函数)
+COMMANDS = {
+    "generate": ("生成小说", _add_generate_args, _do_generate),
+    "world": ("生成世界观", _add_world_args, _do_world),
+    "character": ("生成角色", _add_character_args, _do_character),
+    "server": ("启动服务器", _add_server_args, _do_server),
+    "tools": ("列出工具", None, _do_tools),
+}
 
-    try:
-        if args.command == "generate":
-            novel = await generator.generate_simple_novel(
-                args.title, args.genre, args.chapters
-            )
-            print(f"✅ 小说《{novel['title']}》生成完成！")
-            print(f"   总字数: {novel['total_words']}")
-            print(f"   章节数: {len(novel['chapters'])}")
 
-        elif args.command == "world":
-            result = await generator.generate_world_only(args.genre, args.theme)
-            print(json.dumps(result, ensure_ascii=False, indent=2))
+def _build_parser(argv: list) -> argparse.ArgumentParser:
+    """构建参数解析器，只为本次调用的子命令配置参数"""
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
 
-        elif args.command == "character":
-            result = await generator.generate_character_only(args.type, args.genre)
-            print(json.dumps(result, ensure_ascii=False, indent=2))
+    parser = argparse.ArgumentParser(description="Fantasy Novel MCP")
+    parser.add_argument("--no-cache", action="store_true", help="不使用世界观/角色缓存")
+    subparsers = parser.add_subparsers(dest="command")
 
-        elif args.command == "server":
-            generator.start_server(args.host, args.port, args.debug)
+    for name, (help_text, add_args, _) in COMMANDS.items():
+        sub_parser = subparsers.add_parser(name, help=help_text)
+        if name == command and add_args is not None:
+            add_args(sub_parser)
 
-        elif args.command == "tools":
-            generator.list_tools()
+    return parser
 
+
+async def main():
+    argv = sys.argv[1:]
+    parser = _build_parser(argv)
+    args = parser.parse_args(argv)
+
+    if args.command not in COMMANDS:
+        parser.print_help()
+        return
+    handler = COMMANDS[args.command][2]
+
+    generator = NovelGenerator(use_cache=not args.no_cache)
+
+    try:
+        await handler(generator, args)
     except Exception as e:
         logger.error(f"执行失败: {e}")
 
 
 if __name__ == "__main__":
+    # 可选：使用uvloop事件循环（未安装或Windows平台时使用默认循环）
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(main())
 '''
 
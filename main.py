@@ -5,10 +5,9 @@
 """
 import asyncio
 import argparse
-import json
+import sys
 import time
-from datetime import datetime
-from pathlib import Path
+from itertools import islice
 from loguru import logger
 
 from config.settings import get_settings, validate_config
@@ -16,10 +15,26 @@ from core.tool_registry import get_tool_registry
 from core.mcp_server import get_mcp_server
 from core.cache_manager import get_cache_manager
 
-# 统一的模块注册
-from modules import register_all_tools
-from modules.save_story import save_story_enhanced
-from modules.save_txt import save_novel_as_txt
+
+# 系统状态输出模板
+_STATS_TEMPLATE = """
+        📊 系统状态:
+          已注册工具: {tools} 个
+          工具类别: {categories} 个
+          缓存命名空间: {namespaces} 个
+          缓存项目数: {total_items} 个
+          系统运行时间: {uptime:.1f} 秒
+        """
+
+# 缓存统计的复用时间（秒）
+_STATS_TTL = 1.0
+
+# 启动时必须注册的工具
+_REQUIRED_TOOLS = tuple(sys.intern(name) for name in (
+    "enhanced_story_generator",
+    "character_creator",
+    "story_planner",
+))
 
 
 class NovelGenerator:
@@ -33,6 +48,24 @@ class NovelGenerator:
 
         self._initialized = False
 
+        # 按类别缓存的工具列表及其对应的注册表版本
+        self._category_tools: dict = {}
+        self._category_tools_version = -1
+
+        # 按名称缓存的工具实例及其对应的注册表版本
+        self._tool_cache: dict = {}
+        self._tool_cache_version = -1
+
+        # 缓存统计快照 (获取时间, 数据)，短时间内重复查询直接复用
+        self._stats_cache: tuple = (0.0, None)
+
+        # 命令行命令 -> 处理方法（同步或异步）
+        self._commands = {
+            "help": self._show_help,
+            "generate": self._interactive_generate,
+            "stats": self._show_stats,
+        }
+
     async def initialize(self):
         """初始化系统"""
         if self._initialized:
@@ -43,7 +76,8 @@ class NovelGenerator:
         # 验证配置
         validate_config()
 
-        # 注册所有工具模块
+        # 注册所有工具模块（延迟导入，server/cli启动前不加载各业务模块）
+        from modules import register_all_tools
         register_all_tools(self.tool_registry)
 
         # 检查必需工具
@@ -51,7 +85,7 @@ class NovelGenerator:
             logger.error("工具检查失败，部分功能可能无法使用")
 
         # 显示注册信息
-        stats = self.cache_manager.get_stats()
+        stats = self._get_cache_stats()
         tools_count = len(self.tool_registry.tools)
 
         logger.info(f"✅ 初始化完成")
@@ -62,15 +96,9 @@ class NovelGenerator:
 
     def _check_required_tools(self) -> bool:
         """检查必需工具是否已注册"""
-        required_tools = [
-            "enhanced_story_generator",
-            "character_creator",
-            "story_planner"
-        ]
-
         missing_tools = []
-        for tool_name in required_tools:
-            if not self.tool_registry.get_tool(tool_name):
+        for tool_name in _REQUIRED_TOOLS:
+            if not self._get_tool(tool_name):
                 missing_tools.append(tool_name)
 
         if missing_tools:
@@ -88,9 +116,18 @@ class NovelGenerator:
         host = host or self.settings.mcp.host
         port = port or self.settings.mcp.port
 
+        # 启动前预先解析工具查找
+        self._prefetch_tools()
+
         logger.info(f"🌐 启动MCP服务器: http://{host}:{port}")
         self.mcp_server.run(host=host, port=port)
 
+    def _prefetch_tools(self):
+        """预先解析常用工具及类别列表，填充查找缓存"""
+        for tool_name in _REQUIRED_TOOLS:
+            self._get_tool(tool_name)
+        self._get_category_tools()
+
     async def run_cli(self):
         """运行命令行接口"""
         await self.initialize()
@@ -104,14 +141,15 @@ class NovelGenerator:
 
                 if user_input == "quit":
                     break
-                elif user_input == "help":
-                    self._show_help()
-                elif user_input == "generate":
-                    await self._interactive_generate()
-                elif user_input == "stats":
-                    self._show_stats()
-                else:
+
+                handler = self._commands.get(user_input)
+                if handler is None:
                     print("未知命令，输入 'help' 查看帮助")
+                    continue
+
+                result = handler()
+                if asyncio.iscoroutine(result):
+                    await result
 
             except KeyboardInterrupt:
                 break
@@ -120,6 +158,23 @@ class NovelGenerator:
 
         logger.info("👋 再见！")
 
+    def _get_tool(self, tool_name: str):
+        """获取工具实例（注册表版本不变时复用缓存）"""
+        if self._tool_cache_version != self.tool_registry.version:
+            self._tool_cache.clear()
+            self._tool_cache_version = self.tool_registry.version
+
+        if tool_name not in self._tool_cache:
+            self._tool_cache[tool_name] = self.tool_registry.get_tool(tool_name)
+        return self._tool_cache[tool_name]
+
+    def _get_category_tools(self) -> dict:
+        """获取按类别分组的工具列表（注册表版本不变时复用缓存）"""
+        if self._category_tools_version != self.tool_registry.version:
+            self._category_tools = self.tool_registry.list_by_category(include_hidden=True)
+            self._category_tools_version = self.tool_registry.version
+        return self._category_tools
+
     def _show_help(self):
         """显示帮助信息"""
         print("""
@@ -131,28 +186,36 @@ class NovelGenerator:
 
 🔧 可用工具类别:
 """)
-        for category in self.tool_registry.categories:
-            tools = self.tool_registry.list_tools(category,True)
+        for category, tools in self._get_category_tools().items():
             print(f"  {category}: {len(tools)} 个工具")
 
+    def _get_cache_stats(self) -> dict:
+        """获取缓存统计（1秒内复用上次结果）"""
+        fetched_at, stats = self._stats_cache
+        now = time.monotonic()
+        if stats is None or now - fetched_at > _STATS_TTL:
+            stats = self.cache_manager.get_stats()
+            self._stats_cache = (now, stats)
+        return stats
+
     def _show_stats(self):
         """显示系统统计"""
-        cache_stats = self.cache_manager.get_stats()
+        cache_stats = self._get_cache_stats()
 
-        print(f"""
-        📊 系统状态:
-          已注册工具: {len(self.tool_registry.tools)} 个
-          工具类别: {len(self.tool_registry.categories)} 个
-          缓存命名空间: {cache_stats.get('namespaces', 0)} 个
-          缓存项目数: {cache_stats.get('total_items', 0)} 个
-          系统运行时间: {time.time() - self.tool_registry.start_time:.1f} 秒
-        """)
+        print(_STATS_TEMPLATE.format_map({
+            "namespaces": 0,
+            "total_items": 0,
+            **cache_stats,
+            "tools": len(self.tool_registry.tools),
+            "categories": len(self.tool_registry.categories),
+            "uptime": time.monotonic() - self.tool_registry.start_time,
+        }))
 
         for category, count in cache_stats.get('namespace_details', {}).items():
             print(f"  {category}: {count} 项")
 
     async def _interactive_generate(self):
-        """交互式生成 - 修复版本"""
+        """交互式生成 - 优化版本"""
         print("\n🎨 小说生成向导")
 
         try:
@@ -161,75 +224,84 @@ class NovelGenerator:
             if not theme:
                 theme = "修仙"
 
+            # 新增：询问角色数量
+            char_count_input = input("请输入希望生成的角色数量 (默认5个): ").strip()
+            try:
+                char_count = int(char_count_input) if char_count_input else 5
+                char_count = max(3, min(char_count, 15))  # 限制在3-15个之间
+            except ValueError:
+                char_count = 5
+
+            # 新增：询问是否生成角色关系
+            generate_relationships = input("是否生成角色关系网络? (y/n, 默认y): ").strip().lower()
+            if generate_relationships in ['', 'y', 'yes']:
+                generate_relationships = True
+            else:
+                generate_relationships = False
+
+            print(f"\n🎯 生成参数:")
+            print(f"  主题: {theme}")
+            print(f"  角色数量: {char_count}")
+            print(f"  生成关系: {'是' if generate_relationships else '否'}")
+
             # 使用增强版故事生成器
-            enhanced_tool = self.tool_registry.get_tool("enhanced_story_generator")
+            enhanced_tool = self._get_tool("enhanced_story_generator")
             if not enhanced_tool:
                 print("❌ 增强版故事生成器未找到")
                 return
 
-            print(f"🎯 开始生成 '{theme}' 主题小说...")
+            print("\n🚀 开始生成故事...")
 
             # 生成故事包
             result = await enhanced_tool.execute({
                 "action": "generate_full_story",
-                "base_theme": theme,
-                "chapter_count": 5,  # 简化为5章
-                "randomization_level": 0.8
+                "theme": theme,
+                "character_count": char_count,  # 新增参数
+                "generate_relationships": generate_relationships,  # 新增参数
+                "chapter_count": 10,
+                "word_count": 3000
             })
 
-            if result and result.get("story_package"):
+            if result and "story_package" in result:
                 story = result["story_package"]
+                get = story.get
+                title, genre = get('title', '未命名'), get('genre', '未知')
+                chapters, characters = get('chapters', []), get('characters', [])
 
-                # 安全获取数据，避免索引错误
-                title = story.get('title', '未命名')
-                genre = story.get('genre', '未知')
-                theme_actual = story.get('theme', '未知')
-                chapters = story.get('chapters', [])
-                characters = story.get('characters', [])
-                config = story.get('config', {})
+                print(f"\n✅ 故事生成完成！\n📖 标题: {title}\n📝 类型: {genre}\n"
+                      f"📊 章节数: {len(chapters)}")
 
-                # 安全获取配置信息
-                variant_info = config.get('variant', {})
-                structure = variant_info.get('structure', '标准结构') if variant_info else '标准结构'
-
-                print(f"""
-✅ 生成完成！
-
-📖 故事信息:
-  标题: {title}
-  类型: {genre}
-  主题: {theme_actual}
-  章节数: {len(chapters)}
-
-🎭 主要角色: {len(characters)} 个
-📋 生成配置: {structure}
-""")
-
-                # 显示章节预览（如果有章节）
-                if chapters:
-                    print("\n📚 章节预览:")
-                    for i, chapter in enumerate(chapters[:3], 1):  # 只显示前3章
-                        chapter_title = chapter.get('title', f'第{i}章')
-                        chapter_summary = chapter.get('summary', '暂无摘要')
-                        word_count = chapter.get('word_count', 0)
-                        print(f"  {i}. {chapter_title} ({word_count}字)")
-                        print(f"     {chapter_summary[:50]}...")
-
-                    if len(chapters) > 3:
-                        print(f"  ... 还有 {len(chapters) - 3} 章")
-                else:
-                    print("\n⚠️ 未生成章节内容")
-
-                # 显示角色信息（如果有角色）
+                # 显示角色信息
                 if characters:
-                    print("\n👥 主要角色:")
-                    for i, char in enumerate(characters[:3], 1):  # 只显示前3个角色
+                    n_characters = len(characters)
+                    print(f"\n👥 生成了 {n_characters} 个角色:")
+                    for i, char in enumerate(islice(characters, 5), 1):  # 显示前5个
                         char_name = char.get('name', f'角色{i}')
-                        char_role = char.get('role', '未知角色')
+                        char_role = char.get('story_role', '未知角色')
                         print(f"  {i}. {char_name} - {char_role}")
 
-                    if len(characters) > 3:
-                        print(f"  ... 还有 {len(characters) - 3} 个角色")
+                    if n_characters > 5:
+                        print(f"  ... 还有 {n_characters - 5} 个角色")
+
+                    # 新增：显示关系信息
+                    if generate_relationships:
+                        relationships = get("relationships", [])
+                        if relationships:
+                            n_relationships = len(relationships)
+                            print(f"\n🔗 生成了 {n_relationships} 个角色关系:")
+                            # 角色ID -> 名称索引，避免每个关系都线性查找角色
+                            name_by_id = {char.get('id'): char.get('name', '未知角色')
+                                          for char in characters}
+                            for i, rel in enumerate(islice(relationships, 3), 1):  # 显示前3个关系
+                                char1_name = name_by_id.get(rel.get('character1_id'), '未知角色')
+                                char2_name = name_by_id.get(rel.get('character2_id'), '未知角色')
+                                rel_type = rel.get('relationship_type', '未知关系')
+                                print(f"  {i}. {char1_name} ↔ {char2_name} ({rel_type})")
+
+                            if n_relationships > 3:
+                                print(f"  ... 还有 {n_relationships - 3} 个关系")
+                        else:
+                            print("\n⚠️ 未生成角色关系")
                 else:
                     print("\n⚠️ 未生成角色信息")
 
@@ -239,21 +311,20 @@ class NovelGenerator:
                     await self._save_story(story)
             else:
                 print("❌ 生成失败 - 未返回有效的故事包")
-                # 显示错误详情
                 if result:
                     error_msg = result.get('error', '未知错误')
                     print(f"错误详情: {error_msg}")
 
         except Exception as e:
-            import traceback
-            logger.error(f"生成过程出错: {e}")
-            logger.error(f"错误堆栈: {traceback.format_exc()}")
+            logger.exception(f"生成过程出错: {e}")
             print(f"❌ 生成失败: {e}")
             print("请检查工具是否正确注册和配置")
 
     async def _save_story(self, story: dict):
         """保存故事"""
         try:
+            from modules.save_txt import save_novel_as_txt
+
             result = await save_novel_as_txt(story)
             await self._interactive_save_story(story)
 
@@ -266,7 +337,9 @@ class NovelGenerator:
         try:
             print("\n💾 开始保存故事...")
 
-            # 使用增强版保存方法
+            # 使用增强版保存方法（延迟导入，避免启动时加载数据库模型）
+            from modules.save_story import save_story_enhanced
+
             result = await save_story_enhanced(story)
 
             if result['success']:
@@ -304,7 +377,10 @@ class NovelGenerator:
     async def _save_story_json_fallback(self, story: dict):
         """JSON备份保存方法"""
         try:
+            from datetime import datetime
             from pathlib import Path
+            import aiofiles
+            from core import json_utils
 
             # 创建保存目录
             save_dir = Path("generated_novels")
@@ -315,9 +391,10 @@ class NovelGenerator:
             filename = f"novel_backup_{timestamp}.json"
             filepath = save_dir / filename
 
-            # 保存文件
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(story, f, ensure_ascii=False, indent=2)
+            # 保存文件（异步写入，大型故事不阻塞事件循环）
+            data = json_utils.dumps_bytes(story, indent=True)
+            async with aiofiles.open(filepath, 'wb') as f:
+                await f.write(data)
 
             print(f"📁 紧急备份已保存: {filepath}")
 
@@ -326,135 +403,34 @@ class NovelGenerator:
             print(f"❌ 紧急备份失败: {e}")
 
 
-async def _interactive_generate(self):
-    """交互式生成 - 优化版本"""
-    print("\n🎨 小说生成向导")
-
-    try:
-        # 获取用户输入
-        theme = input("请输入小说主题 (如: 修仙, 都市, 科幻): ").strip()
-        if not theme:
-            theme = "修仙"
-
-        # 新增：询问角色数量
-        char_count_input = input("请输入希望生成的角色数量 (默认5个): ").strip()
-        try:
-            char_count = int(char_count_input) if char_count_input else 5
-            char_count = max(3, min(char_count, 15))  # 限制在3-15个之间
-        except ValueError:
-            char_count = 5
-
-        # 新增：询问是否生成角色关系
-        generate_relationships = input("是否生成角色关系网络? (y/n, 默认y): ").strip().lower()
-        if generate_relationships in ['', 'y', 'yes']:
-            generate_relationships = True
-        else:
-            generate_relationships = False
-
-        print(f"\n🎯 生成参数:")
-        print(f"  主题: {theme}")
-        print(f"  角色数量: {char_count}")
-        print(f"  生成关系: {'是' if generate_relationships else '否'}")
-
-        # 使用增强版故事生成器
-        enhanced_tool = self.tool_registry.get_tool("enhanced_story_generator")
-        if not enhanced_tool:
-            print("❌ 增强版故事生成器未找到")
-            return
-
-        print("\n🚀 开始生成故事...")
-
-        # 生成故事包
-        result = await enhanced_tool.execute({
-            "action": "generate_full_story",
-            "theme": theme,
-            "character_count": char_count,  # 新增参数
-            "generate_relationships": generate_relationships,  # 新增参数
-            "chapter_count": 10,
-            "word_count": 3000
-        })
-
-        if result and "story_package" in result:
-            story = result["story_package"]
-
-            print("\n✅ 故事生成完成！")
-            print(f"📖 标题: {story.get('title', '未命名')}")
-            print(f"📝 类型: {story.get('genre', '未知')}")
-            print(f"📊 章节数: {len(story.get('chapters', []))}")
-
-            # 显示角色信息
-            characters = story.get("characters", [])
-            if characters:
-                print(f"\n👥 生成了 {len(characters)} 个角色:")
-                for i, char in enumerate(characters[:5]):  # 显示前5个
-                    char_name = char.get('name', f'角色{i + 1}')
-                    char_role = char.get('story_role', '未知角色')
-                    print(f"  {i + 1}. {char_name} - {char_role}")
-
-                if len(characters) > 5:
-                    print(f"  ... 还有 {len(characters) - 5} 个角色")
-
-                # 新增：显示关系信息
-                if generate_relationships:
-                    relationships = story.get("relationships", [])
-                    if relationships:
-                        print(f"\n🔗 生成了 {len(relationships)} 个角色关系:")
-                        for i, rel in enumerate(relationships[:3]):  # 显示前3个关系
-                            char1_name = self._get_character_name_by_id(characters,
-                                                                        rel.get('character1_id'))
-                            char2_name = self._get_character_name_by_id(characters,
-                                                                        rel.get('character2_id'))
-                            rel_type = rel.get('relationship_type', '未知关系')
-                            print(f"  {i + 1}. {char1_name} ↔ {char2_name} ({rel_type})")
-
-                        if len(relationships) > 3:
-                            print(f"  ... 还有 {len(relationships) - 3} 个关系")
-                    else:
-                        print("\n⚠️ 未生成角色关系")
-            else:
-                print("\n⚠️ 未生成角色信息")
-
-            # 询问是否保存
-            save = input("\n是否保存生成结果? (y/n): ").strip().lower()
-            if save == 'y':
-                await self._save_story(story)
-        else:
-            print("❌ 生成失败 - 未返回有效的故事包")
-            if result:
-                error_msg = result.get('error', '未知错误')
-                print(f"错误详情: {error_msg}")
-
-    except Exception as e:
-        import traceback
-        logger.error(f"生成过程出错: {e}")
-        logger.error(f"错误堆栈: {traceback.format_exc()}")
-        print(f"❌ 生成失败: {e}")
-        print("请检查工具是否正确注册和配置")
-
-
-def _get_character_name_by_id(self, characters: list, char_id: str) -> str:
-    """根据ID获取角色名称"""
-    for char in characters:
-        if char.get('id') == char_id:
-            return char.get('name', '未知角色')
-    return '未知角色'
-
-
-async def main():
-    """主函数"""
+def _build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
     parser = argparse.ArgumentParser(description="玄幻小说自动生成器")
     parser.add_argument("--mode", choices=["server", "cli"], default="cli",
                         help="运行模式 (server/cli)")
     parser.add_argument("--host", default="localhost", help="服务器地址")
     parser.add_argument("--port", type=int, default=8080, help="服务器端口")
     parser.add_argument("--debug", action="store_true", help="调试模式")
+    return parser
+
 
-    args = parser.parse_args()
+# 模块加载时构建一次，重复调用main()时复用
+_PARSER = _build_parser()
 
-    # 设置日志级别
-    if args.debug:
-        logger.remove()
-        logger.add(lambda msg: print(msg, end=""), level="DEBUG")
+
+async def main():
+    """主函数"""
+    args = _PARSER.parse_args()
+
+    # 设置日志：enqueue=True 由后台线程写日志，避免阻塞事件循环
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level="DEBUG" if args.debug else "INFO",
+        enqueue=True,
+        backtrace=args.debug,
+        diagnose=args.debug
+    )
 
     # 创建生成器
     generator = NovelGenerator()
@@ -471,4 +447,11 @@ async def main():
         raise
 
 if __name__ == "__main__":
+    # 可选：使用uvloop事件循环（未安装或Windows平台时使用默认循环）
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(main())
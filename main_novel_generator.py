@@ -5,23 +5,38 @@
 """
 
 import asyncio
+import hashlib
+from contextlib import AsyncExitStack
+import os
+import tempfile
 import time
 import json
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+import aiofiles
 from loguru import logger
 
 # 导入现有组件
+from core import json_utils
 from core.tool_registry import get_tool_registry
-from core.base_tools import ToolCall
+from core.base_tools import ToolCall, ToolResponse
 from modules.generation.enhanced_story_generator import EnhancedStoryGeneratorTool
 from modules.writing.chapter_writer import ChapterWriterTool
-from modules.save_txt import NovelTextFormatter
+from modules.save_txt import (
+    NovelTextFormatter, safe_filename, write_formatted_novel, write_novel_with_body
+)
 from config.config_manager import get_novel_config, get_enhanced_config
 from config.settings import get_settings
 from config.logger import setup_logging
 
+# 作为后续章节上下文时，每章摘要保留的最大字数
+_PREVIOUS_CHAPTER_SUMMARY_CHARS = 400
+
+# 磁盘缓存条目的有效期（秒）与最多保留的条目数
+_CACHE_TTL_SECONDS = 7 * 24 * 3600
+_CACHE_MAX_ENTRIES = 200
+
 
 class AutoNovelGenerator:
     """自动小说生成器主程序"""
@@ -40,6 +55,9 @@ class AutoNovelGenerator:
         # 文件保存配置
         self.output_dir = Path("generated_novels")
         self.output_dir.mkdir(exist_ok=True)
+        self.cache_dir = self.output_dir / ".cache"
+        self.cache_dir.mkdir(exist_ok=True)
+        self._prune_cache()
 
         # 初始化格式化器
         self.formatter = NovelTextFormatter()
@@ -70,7 +88,9 @@ class AutoNovelGenerator:
         word_count_per_chapter: int = None,
         randomization_level: float = None,
         title: str = None,
-        auto_save: bool = True
+        auto_save: bool = True,
+        cache_enabled: bool = False,
+        cache_tag: str = None
     ) -> Dict[str, Any]:
         """
         自动生成完整小说
@@ -82,8 +102,10 @@ class AutoNovelGenerator:
             randomization_level: 随机化程度（默认使用配置）
             title: 自定义标题
             auto_save: 是否自动保存
+            cache_enabled: 是否复用磁盘缓存中相同参数的故事包与章节（默认关闭）
+            cache_tag: 缓存标签，计入缓存键；随机化开启时必须指定，否则本次不使用缓存
         """
-        start_time = time.time()
+        start_time = time.monotonic()
 
         # 使用配置默认值
         chapter_count = chapter_count or self.novel_config.default_chapter_count
@@ -93,49 +115,79 @@ class AutoNovelGenerator:
         logger.info(
             f"开始自动生成小说：{theme} | {chapter_count}章 | 每章{word_count_per_chapter}字")
 
+        # 缓存作用域计入缓存键，None表示不使用缓存
+        cache_scope = None
+        if cache_enabled:
+            if cache_tag:
+                cache_scope = cache_tag
+            elif randomization_level > 0:
+                # 随机化结果不应跨运行复用，否则相同主题总是得到同一个故事
+                logger.info("随机化已开启且未指定缓存标签，本次不使用缓存")
+            else:
+                cache_scope = ""
+
+        body_path = None
+        checkpoint_path = None
         try:
             # 第一步：生成完整故事包（使用现有工具）
             story_package = await self._generate_story_package(
-                theme, chapter_count, word_count_per_chapter, randomization_level
+                theme, chapter_count, word_count_per_chapter, randomization_level, cache_scope
             )
 
             if not story_package.get("success", True):
                 raise Exception(f"故事包生成失败: {story_package.get('error', '未知错误')}")
 
+            novel_title = title or f"{theme}小说"
+
+            # 自动保存时，章节完成后立即逐章写入正文临时文件，保存时只需拼接前后部分
+            body_path = self._chapter_body_path(novel_title) if auto_save else None
+            # 章节检查点只在生成失败时保留，用于找回已完成的章节
+            checkpoint_path = self._chapter_checkpoint_path(story_package)
+
             # 第二步：生成具体章节内容
             chapters = await self._generate_chapters(
-                story_package, chapter_count, word_count_per_chapter
+                story_package, chapter_count, word_count_per_chapter, cache_scope, body_path,
+                checkpoint_path
             )
 
             # 第三步：组装最终小说
             final_novel = await self._assemble_novel(
-                story_package, chapters, title or f"{theme}小说"
+                story_package, chapters, novel_title
             )
 
             # 第四步：保存文件（如果启用自动保存）
             if auto_save:
-                saved_path = await self._save_novel(final_novel)
+                saved_path = await self._save_novel(final_novel, body_path)
                 final_novel["saved_path"] = saved_path
 
-            generation_time = time.time() - start_time
+            generation_time = time.monotonic() - start_time
             final_novel["generation_time"] = generation_time
 
             logger.info(f"✅ 小说生成完成！用时 {generation_time:.2f} 秒")
+            stats = final_novel["statistics"]
             logger.info(
-                f"📊 生成统计: {len(chapters)}章，总计约{sum(c.get('word_count', 0) for c in chapters):,}字")
+                f"📊 生成统计: {stats['total_chapters']}章，总计约{stats['total_words']:,}字")
 
+            checkpoint_path.unlink(missing_ok=True)
             return final_novel
 
         except Exception as e:
             logger.error(f"小说生成失败: {e}")
+            if checkpoint_path is not None and checkpoint_path.exists():
+                logger.info(f"💾 已完成的章节保存在检查点: {checkpoint_path}")
             return {
                 "success": False,
                 "error": str(e),
-                "generation_time": time.time() - start_time
+                "generation_time": time.monotonic() - start_time
             }
+        finally:
+            # 正文临时文件只在本次运行内使用，成功、失败或取消时都删除
+            if body_path is not None:
+                body_path.unlink(missing_ok=True)
 
     async def _generate_story_package(
-        self, theme: str, chapter_count: int, word_count: int, randomization_level: float
+        self, theme: str, chapter_count: int, word_count: int, randomization_level: float,
+        cache_scope: Optional[str] = None
     ) -> Dict[str, Any]:
         """生成故事包（配置、角色、大纲）"""
         logger.info("🎲 生成故事配置包...")
@@ -156,7 +208,7 @@ class AutoNovelGenerator:
             }
         )
 
-        response = await self.tool_registry.execute_tool(tool_call)
+        response = await self._execute_tool_cached(tool_call, cache_scope)
 
         if not response.success:
             logger.error(f"故事包生成失败: {response.error}")
@@ -166,65 +218,116 @@ class AutoNovelGenerator:
         return response.result
 
     async def _generate_chapters(
-        self, story_package: Dict[str, Any], chapter_count: int, word_count: int
+        self, story_package: Dict[str, Any], chapter_count: int, word_count: int,
+        cache_scope: Optional[str] = None, body_path: Optional[Path] = None,
+        checkpoint_path: Optional[Path] = None
     ) -> List[Dict[str, Any]]:
-        """生成所有章节内容"""
+        """生成所有章节内容
+
+        body_path 不为空时，每章完成后按最终txt格式追加写入该文件；
+        每章完成后同时追加写入 checkpoint_path（未指定时按故事标题生成）
+        """
         logger.info(f"📝 开始生成 {chapter_count} 个章节...")
 
-        chapters = []
+        # 预分配章节槽位，各章节按索引回填，保证顺序与并发写入安全
+        chapters: List[Optional[Dict[str, Any]]] = [None] * chapter_count
+        # 每章完成时提取一次简短摘要，后续批次只携带摘要而非完整正文
+        chapter_digests: List[Optional[Dict[str, Any]]] = [None] * chapter_count
         story_context = {
             "characters": story_package.get("characters", []),
             "world_setting": story_package.get("plot_outline", {}),
             "story_config": story_package.get("config", {})
         }
 
-        # 并发生成前几章，然后串行生成后续章节（保持连贯性）
-        batch_size = min(3, chapter_count)  # 前3章并发生成
+        # 每章完成后立即追加到NDJSON检查点文件，生成中断时已完成的章节不会丢失
+        if checkpoint_path is None:
+            checkpoint_path = self._chapter_checkpoint_path(story_package)
+        async with AsyncExitStack() as stack:
+            checkpoint = await stack.enter_async_context(aiofiles.open(checkpoint_path, "wb"))
+            body = None
+            if body_path is not None:
+                body = await stack.enter_async_context(
+                    aiofiles.open(body_path, "w", encoding="utf-8"))
+
+            # 按批次生成：批内章节并发，每批基于之前批次的最近3章（保持连贯性）
+            wave_size = max(1, self.novel_config.concurrent_chapters)
+
+            for wave_start in range(0, chapter_count, wave_size):
+                wave = range(wave_start, min(wave_start + wave_size, chapter_count))
+
+                wave_context = story_context
+                if wave_start:
+                    # 更新故事上下文，包含已生成的章节
+                    wave_context = story_context.copy()
+                    window_start = max(0, wave_start - 3)  # 最近3章
+                    wave_context["previous_chapters"] = chapter_digests[window_start:wave_start]
+
+                results = await asyncio.gather(
+                    *(self._generate_single_chapter(
+                        i + 1, wave_context, word_count, story_package, cache_scope
+                    ) for i in wave),
+                    return_exceptions=True
+                )
 
-        # 第一批：并发生成
-        first_batch_tasks = []
-        for i in range(min(batch_size, chapter_count)):
-            task = self._generate_single_chapter(
-                i + 1, story_context, word_count, story_package
-            )
-            first_batch_tasks.append(task)
+                # 按章节顺序处理本批结果
+                for i, result in zip(wave, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"第{i + 1}章生成失败: {result}")
+                        chapters[i] = self._create_fallback_chapter(i + 1, word_count)
+                    else:
+                        chapters[i] = result
+                        logger.info(f"✅ 第{i + 1}章生成完成 ({result.get('word_count', 0)}字)")
+                    chapter_digests[i] = self._chapter_digest(i + 1, chapters[i])
+                    await self._write_chapter_checkpoint(checkpoint, chapters[i])
+                    if body is not None:
+                        await body.write((self.formatter.chapter_joiner if i else "")
+                                         + self.formatter.format_chapter(i + 1, chapters[i]))
 
-        first_batch = await asyncio.gather(*first_batch_tasks, return_exceptions=True)
+        logger.info(f"✅ 所有章节生成完成，共 {len(chapters)} 章")
+        return chapters
 
-        # 处理第一批结果
-        for i, result in enumerate(first_batch):
-            if isinstance(result, Exception):
-                logger.error(f"第{i + 1}章生成失败: {result}")
-                chapters.append(self._create_fallback_chapter(i + 1, word_count))
-            else:
-                chapters.append(result)
-                logger.info(f"✅ 第{i + 1}章生成完成")
+    @staticmethod
+    def _chapter_digest(chapter_num: int, chapter: Dict[str, Any]) -> Dict[str, Any]:
+        """提取章节编号、标题与简短摘要，作为后续章节的上下文
 
-        # 剩余章节：串行生成（基于前面章节的内容）
-        for i in range(batch_size, chapter_count):
-            try:
-                # 更新故事上下文，包含已生成的章节
-                updated_context = story_context.copy()
-                updated_context["previous_chapters"] = chapters[-3:]  # 最近3章
+        兼容章节写作器结果（内容位于chapter_content）与备用章节两种结构；
+        没有摘要时截取正文开头
+        """
+        body = chapter.get("chapter_content") or chapter
+        summary = body.get("summary") or ""
+        if not summary:
+            content = body.get("content") or "\n\n".join(
+                scene.get("content", "") for scene in body.get("scenes", []))
+            summary = content[:_PREVIOUS_CHAPTER_SUMMARY_CHARS]
 
-                chapter = await self._generate_single_chapter(
-                    i + 1, updated_context, word_count, story_package
-                )
-                chapters.append(chapter)
-                logger.info(f"✅ 第{i + 1}章生成完成")
+        return {
+            "chapter_number": chapter_num,
+            "title": body.get("title", f"第{chapter_num}章"),
+            "summary": summary[:_PREVIOUS_CHAPTER_SUMMARY_CHARS]
+        }
 
-                # 短暂延迟，避免API限流
-                await asyncio.sleep(0.5)
+    def _chapter_body_path(self, title: str) -> Path:
+        """逐章写入的正文临时文件路径，本次生成结束后删除"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.output_dir / f"{safe_filename(title)}_{timestamp}.body.partial.txt"
 
-            except Exception as e:
-                logger.error(f"第{i + 1}章生成失败: {e}")
-                chapters.append(self._create_fallback_chapter(i + 1, word_count))
+    def _chapter_checkpoint_path(self, story_package: Dict[str, Any]) -> Path:
+        """章节检查点文件路径（每行一个章节的JSON）"""
+        title = safe_filename(story_package.get("title", "")) or "novel"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return self.output_dir / f"{title}_{timestamp}.chapters.ndjson"
 
-        logger.info(f"✅ 所有章节生成完成，共 {len(chapters)} 章")
-        return chapters
+    async def _write_chapter_checkpoint(self, checkpoint, chapter: Dict[str, Any]) -> None:
+        """追加写入单个章节，写入失败只记录警告，不影响章节生成"""
+        try:
+            await checkpoint.write(json_utils.dumps_bytes(chapter) + b"\n")
+            await checkpoint.flush()
+        except Exception as e:
+            logger.warning(f"章节检查点写入失败: {e}")
 
     async def _generate_single_chapter(
-        self, chapter_num: int, story_context: Dict, word_count: int, story_package: Dict
+        self, chapter_num: int, story_context: Dict, word_count: int, story_package: Dict,
+        cache_scope: Optional[str] = None
     ) -> Dict[str, Any]:
         """生成单个章节"""
 
@@ -255,7 +358,7 @@ class AutoNovelGenerator:
             }
         )
 
-        response = await self.tool_registry.execute_tool(tool_call)
+        response = await self._execute_tool_cached(tool_call, cache_scope, chapter_num)
 
         if response.success:
             return response.result
@@ -263,6 +366,81 @@ class AutoNovelGenerator:
             logger.warning(f"章节生成器失败，使用备用方案: {response.error}")
             return self._create_fallback_chapter(chapter_num, word_count)
 
+    async def _execute_tool_cached(self, tool_call: ToolCall, cache_scope: Optional[str] = None,
+                                   extra_key: Any = None) -> ToolResponse:
+        """执行工具调用，cache_scope 不为None时复用磁盘上相同工具与参数的成功结果
+
+        缓存键为缓存作用域、工具名、参数与附加键（如章节号）规范化JSON的blake2b摘要，
+        只缓存成功的结果，失败时照常返回以便调用方走备用方案；超过有效期的条目视为未命中
+        """
+        if cache_scope is None:
+            return await self.tool_registry.execute_tool(tool_call)
+
+        key_source = json.dumps([cache_scope, tool_call.name, tool_call.parameters, extra_key],
+                                sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.blake2b(key_source.encode("utf-8"), digest_size=16).hexdigest()
+        cache_path = self.cache_dir / f"{tool_call.name}_{digest}.json"
+
+        if cache_path.exists() and not self._cache_entry_expired(cache_path):
+            try:
+                async with aiofiles.open(cache_path, "rb") as f:
+                    result = json_utils.loads(await f.read())
+                logger.info(f"♻️ 命中缓存: {tool_call.name} ({digest[:8]})")
+                return ToolResponse(id=tool_call.id, success=True, result=result,
+                                    metadata={"cached": True})
+            except Exception as e:
+                logger.warning(f"读取缓存失败，重新生成: {e}")
+
+        response = await self.tool_registry.execute_tool(tool_call)
+
+        if response.success:
+            try:
+                await asyncio.to_thread(self._write_cache_entry, cache_path,
+                                        json_utils.dumps_bytes(response.result))
+            except Exception as e:
+                logger.warning(f"写入缓存失败: {e}")
+
+        return response
+
+    def _write_cache_entry(self, cache_path: Path, data: bytes) -> None:
+        """先写唯一命名的临时文件再原子替换，中断或并发写入同一键时不会留下不完整的缓存"""
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+            f.write(data)
+        try:
+            os.replace(f.name, cache_path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    @staticmethod
+    def _cache_entry_expired(cache_path: Path) -> bool:
+        """缓存条目是否超过有效期"""
+        try:
+            return time.time() - cache_path.stat().st_mtime > _CACHE_TTL_SECONDS
+        except OSError:
+            return True
+
+    def _prune_cache(self) -> None:
+        """删除过期的缓存条目，并只保留最新的 _CACHE_MAX_ENTRIES 个（初始化时执行一次）"""
+        try:
+            entries = sorted(((path.stat().st_mtime, path)
+                              for path in self.cache_dir.glob("*.json")), reverse=True)
+            now = time.time()
+            for index, (mtime, path) in enumerate(entries):
+                if index >= _CACHE_MAX_ENTRIES or now - mtime > _CACHE_TTL_SECONDS:
+                    path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"清理缓存失败: {e}")
+
+    def clear_cache(self) -> int:
+        """清空磁盘缓存，返回删除的条目数"""
+        removed = 0
+        for path in self.cache_dir.glob("*.json"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        logger.info(f"🧹 已清空缓存: {removed} 个条目")
+        return removed
+
     def _create_fallback_chapter(self, chapter_num: int, word_count: int) -> Dict[str, Any]:
         """创建备用章节（当生成失败时）"""
         return {
@@ -281,8 +459,12 @@ class AutoNovelGenerator:
         logger.info("📚 组装最终小说...")
 
         # 计算统计信息
-        total_words = sum(c.get("word_count", 0) for c in chapters)
-        successful_chapters = len([c for c in chapters if not c.get("is_fallback", False)])
+        total_words = 0
+        successful_chapters = 0
+        for chapter in chapters:
+            total_words += chapter.get("word_count", 0)
+            if not chapter.get("is_fallback", False):
+                successful_chapters += 1
 
         # 准备完整的小说数据包
         novel_data = {
@@ -315,8 +497,13 @@ class AutoNovelGenerator:
             }
         }
 
-    async def _save_novel(self, novel_result: Dict[str, Any]) -> str:
-        """保存小说到文件"""
+    async def _save_novel(self, novel_result: Dict[str, Any],
+                          body_path: Optional[Path] = None) -> str:
+        """保存小说到文件
+
+        body_path 为生成章节时逐章写好的正文文件，存在时直接与前后部分拼接，
+        不再在内存中格式化整部小说
+        """
         if not novel_result.get("success"):
             raise Exception("无法保存失败的小说生成结果")
 
@@ -325,15 +512,15 @@ class AutoNovelGenerator:
         # 生成文件名
         title = novel_data["title"]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{title}_{timestamp}.txt"
+        filename = f"{safe_filename(title)}_{timestamp}.txt"
         filepath = self.output_dir / filename
 
-        # 使用现有的格式化器
-        formatted_content = self.formatter.format_novel_content(novel_data)
-
-        # 保存文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(formatted_content)
+        # 使用现有的格式化器，格式化与写入都在线程中执行，避免阻塞事件循环
+        if body_path is not None and body_path.exists() and novel_data["chapters"]:
+            await asyncio.to_thread(write_novel_with_body, novel_data, body_path, filepath,
+                                    self.formatter)
+        else:
+            await asyncio.to_thread(write_formatted_novel, novel_data, filepath, self.formatter)
 
         logger.info(f"📁 小说已保存: {filepath}")
         return str(filepath)
@@ -370,9 +557,6 @@ class AutoNovelGenerator:
                     "result": result
                 })
 
-                # 批量生成时的延迟
-                await asyncio.sleep(2)
-
         logger.info(f"✅ 批量生成完成，共生成 {len(all_results)} 部小说")
         return all_results
 
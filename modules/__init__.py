@@ -3,12 +3,21 @@
 模块工具统一注册系统
 消除分散的注册代码
 """
+import weakref
+
 from core.tool_registry import ToolRegistry
 from loguru import logger
 
+# 已完成注册的注册表，避免长期运行的进程（CLI多轮会话、测试）重复注册
+_registered_registries: "weakref.WeakSet[ToolRegistry]" = weakref.WeakSet()
+
 
 def register_all_tools(registry: ToolRegistry):
-    """注册所有模块工具"""
+    """注册所有模块工具（同一注册表只注册一次）"""
+
+    if registry in _registered_registries:
+        logger.debug("工具已注册，跳过重复注册")
+        return
 
     registered_count = 0
 
@@ -62,4 +71,5 @@ def register_all_tools(registry: ToolRegistry):
     except ImportError as e:
         logger.warning(f"生成增强模块导入失败: {e}")
 
+    _registered_registries.add(registry)
     logger.info(f"工具注册完成，共注册 {len(registry.tools)} 个工具")
@@ -4,7 +4,8 @@
 检查小说中的各种一致性问题
 """
 
-from typing import Dict, Any, List, Optional, Set
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Set
 from dataclasses import dataclass, asdict
 from core.base_tools import AsyncTool, ToolDefinition, ToolParameter
 from core.llm_client import get_llm_service
@@ -137,6 +138,11 @@ class ConsistencyChecker:
 
         issues = []
 
+        # 只有长度相同的名字才可能相似，按长度分桶，避免每个角色都与全部角色比较
+        names_by_length: Dict[int, List[str]] = defaultdict(list)
+        for char_name in self.character_registry:
+            names_by_length[len(char_name)].append(char_name)
+
         for char_name, character in self.character_registry.items():
             # 检查角色信息完整性
             required_fields = ["name", "appearance", "personality", "background"]
@@ -154,7 +160,8 @@ class ConsistencyChecker:
                 ))
 
             # 检查角色名称重复
-            similar_names = self._find_similar_names(char_name)
+            similar_names = self._find_similar_names(char_name,
+                                                     names_by_length[len(char_name)])
             if similar_names:
                 issues.append(ConsistencyIssue(
                     id=f"char_{char_name}_similar",
@@ -284,10 +291,11 @@ class ConsistencyChecker:
 
         return issues
 
-    def _find_similar_names(self, name: str) -> List[str]:
-        """查找相似名称"""
+    def _find_similar_names(self, name: str,
+                            candidates: Optional[Iterable[str]] = None) -> List[str]:
+        """查找相似名称，candidates 为待比较的名字，默认比较全部角色"""
         similar = []
-        for other_name in self.character_registry.keys():
+        for other_name in (self.character_registry.keys() if candidates is None else candidates):
             if other_name != name and self._names_similar(name, other_name):
                 similar.append(other_name)
         return similar
@@ -150,15 +150,20 @@ class QualityAnalyzer:
             score = 40
             suggestions.append("需要实际的文字内容进行分析")
         else:
-            # 简单的文本质量检查
-            total_words = sum(chapter.get("word_count_target", 0) for chapter in chapters)
+            # 单次遍历同时统计目标字数与带详细描述的章节数
+            total_words = 0
+            described_chapters = 0
+            for chapter in chapters:
+                total_words += chapter.get("word_count_target", 0)
+                if chapter.get("detailed_summary"):
+                    described_chapters += 1
 
+            # 简单的文本质量检查
             if total_words < 10000:
                 suggestions.append("增加内容丰富度")
 
             # 检查描述丰富度
-            chapters_with_descriptions = [c for c in chapters if c.get("detailed_summary")]
-            if len(chapters_with_descriptions) < len(chapters) * 0.8:
+            if described_chapters < len(chapters) * 0.8:
                 score -= 10
                 suggestions.append("增加场景和情感描述")
 
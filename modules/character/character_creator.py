@@ -7,14 +7,17 @@ import asyncio
 import json
 import random
 import re
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, fields
 from datetime import time
 from enum import Enum
-from typing import Dict, Any, List, Optional, Set
+from typing import Deque, Dict, Any, List, Optional, Set, Tuple
 
 from loguru import logger
 
 from config.settings import get_prompt_manager
+from core import json_utils
+from core.base_tools import DATACLASS_SLOTS
 from core.llm_client import get_llm_service
 
 
@@ -45,7 +48,7 @@ class PowerLevel(Enum):
     IMMORTAL = "仙人"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class CharacterAppearance:
     """角色外貌"""
     gender: str  # 性别
@@ -60,7 +63,7 @@ class CharacterAppearance:
     accessories: List[str]  # 配饰
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class CharacterPersonality:
     """角色性格"""
     core_traits: List[str]  # 核心特质
@@ -73,7 +76,7 @@ class CharacterPersonality:
     moral_alignment: str  # 道德取向
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class CharacterBackground:
     """角色背景"""
     birthplace: str  # 出生地
@@ -86,7 +89,7 @@ class CharacterBackground:
     goals: List[str]  # 目标
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class CharacterAbilities:
     """角色能力"""
     power_level: str  # 实力等级
@@ -100,7 +103,7 @@ class CharacterAbilities:
     growth_potential: str = ""
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class Character:
     """完整角色"""
     id: str  # 角色ID
@@ -125,6 +128,61 @@ class Character:
     inspiration: str  # 灵感来源
 
 
+# 合并生成角色详情时各部分需要返回的字段，由数据类定义推导
+_DETAIL_SECTION_FIELDS = {
+    "appearance": tuple(f.name for f in fields(CharacterAppearance)),
+    "personality": tuple(f.name for f in fields(CharacterPersonality)),
+    "background": tuple(f.name for f in fields(CharacterBackground)),
+    "abilities": tuple(f.name for f in fields(CharacterAbilities)),
+}
+
+# 静态查找表，模块加载时构建一次，避免每次调用重新分配
+_IMPORTANCE_MAP = {
+    "主角": 10,
+    "重要配角": 8,
+    "一般配角": 5,
+    "反派": 9,
+    "导师": 7,
+    "爱情线角色": 6,
+    "搞笑角色": 4,
+    "背景角色": 2
+}
+
+_ARC_TEMPLATES = {
+    "主角": "从平凡到非凡的成长历程",
+    "重要配角": "与主角并肩成长的伙伴之路",
+    "反派": "从对立到可能的救赎",
+    "导师": "传承智慧与最终的告别",
+    "爱情线角色": "情感的萌芽与深化"
+}
+
+# 提示词中列出的最近已用名字数量上限，避免提示词随角色数量无限增长
+_PROMPT_AVOID_NAME_LIMIT = 50
+
+# 各角色类型的默认核心特质
+_TYPE_TRAITS = {
+    "主角": ("勇敢", "坚毅", "正义", "责任心强", "不服输"),
+    "反派": ("野心勃勃", "狡诈", "强势", "目标明确", "手段多样"),
+    "配角": ("忠诚", "可靠", "有特色", "支持主角", "各有所长")
+}
+_DEFAULT_TRAITS = ("平衡", "理性", "适应力强", "有原则", "善于学习")
+
+_NAME_PREFIXES = ("名字：", "姓名：", "角色名：", "建议：", "推荐：")
+
+_TEXT_RESPONSE_PATTERNS = {
+    key: re.compile(pattern, re.IGNORECASE)
+    for key, pattern in {
+        'name': r'(?:姓名|名字|name)[：:]\s*([^\n,，]+)',
+        'gender': r'(?:性别|gender)[：:]\s*([^\n,，]+)',
+        'age': r'(?:年龄|age)[：:]\s*(\d+)',
+        'height': r'(?:身高|height)[：:]\s*([^\n,，]+)',
+        'personality': r'(?:性格|特质|personality)[：:]\s*([^\n]+)',
+        'background': r'(?:背景|出身|background)[：:]\s*([^\n]+)',
+        'abilities': r'(?:能力|技能|abilities)[：:]\s*([^\n]+)'
+    }.items()
+}
+
+
 def _load_name_banks() -> Dict[str, List[str]]:
     """加载名称库"""
     return {
@@ -146,6 +204,22 @@ def _load_name_banks() -> Dict[str, List[str]]:
     }
 
 
+def _build_given_name_pools(
+    name_banks: Dict[str, List[str]]
+) -> Dict[str, Tuple[List[str], List[str]]]:
+    """按性别预先拆分单字名与多字名，生成名字时直接随机抽取"""
+    pools = {}
+    for gender, given_names in (
+        ("male", name_banks["male_given"]),
+        ("female", name_banks["female_given"]),
+        ("any", name_banks["male_given"] + name_banks["female_given"])
+    ):
+        single_chars = [n for n in given_names if len(n) == 1]
+        compound_names = [n for n in given_names if len(n) > 1]
+        pools[gender] = (single_chars, compound_names)
+    return pools
+
+
 class CharacterCreator:
     """角色创建器"""
 
@@ -156,7 +230,9 @@ class CharacterCreator:
 
         # 添加名称管理
         self.used_names: Set[str] = set()
+        self.recent_names: Deque[str] = deque(maxlen=_PROMPT_AVOID_NAME_LIMIT)
         self.name_banks = _load_name_banks()
+        self.given_name_pools = _build_given_name_pools(self.name_banks)
 
     async def create_character(
         self,
@@ -169,19 +245,26 @@ class CharacterCreator:
 
         # 生成基础信息
         basic_info = await self._generate_basic_info(character_type, genre, requirements)
-        logger.info(f"生成基础信息-->{basic_info}")
-        # 生成外貌
-        appearance = await self._generate_appearance(basic_info, world_setting)
-        logger.info(f"生成外貌-->{appearance}")
-        # 生成性格
-        personality = await self._generate_personality(basic_info, character_type)
-        logger.info(f"生成性格-->{personality}")
-        # 生成背景
-        background = await self._generate_background(basic_info, world_setting)
-        logger.info(f"生成背景-->{background}")
-        # 生成能力
-        abilities = await self._generate_abilities(basic_info, genre, world_setting)
-        logger.info(f"生成能力-->{abilities}")
+        logger.opt(lazy=True).info("生成基础信息-->{}", lambda: json_utils.dumps(basic_info))
+        # 优先一次请求合并生成外貌、性格、背景、能力
+        details = await self._generate_details_bulk(
+            basic_info, character_type, genre, world_setting
+        )
+        if details is None:
+            # 合并生成失败时分项生成，各部分只依赖基础信息，并发请求
+            details = await asyncio.gather(
+                self._generate_appearance(basic_info, world_setting),
+                self._generate_personality(basic_info, character_type),
+                self._generate_background(basic_info, world_setting),
+                self._generate_abilities(basic_info, genre, world_setting)
+            )
+        appearance, personality, background, abilities = details
+        # 惰性日志：仅在INFO级别实际输出时才序列化各部分
+        lazy_logger = logger.opt(lazy=True)
+        lazy_logger.info("生成外貌-->{}", lambda: json_utils.dumps(appearance))
+        lazy_logger.info("生成性格-->{}", lambda: json_utils.dumps(personality))
+        lazy_logger.info("生成背景-->{}", lambda: json_utils.dumps(background))
+        lazy_logger.info("生成能力-->{}", lambda: json_utils.dumps(abilities))
         # 组装角色
         character = Character(
             id=f"char_{random.randint(1000, 9999)}",
@@ -275,7 +358,7 @@ class CharacterCreator:
             """
 
         response_text = await self._generate_with_retry(prompt)
-        basic_info = await self._parse_json_response(response_text)
+        basic_info = self._parse_json_response(response_text)
 
         # 确保基础信息完整
         basic_info = self._ensure_complete_basic_info(basic_info, character_type, genre,requirements)
@@ -330,15 +413,20 @@ class CharacterCreator:
                 name = self._generate_name_with_rules(character_type, requirements)
 
             if name and name not in self.used_names:
-                self.used_names.add(name)
+                self._remember_name(name)
                 return name
 
         # 如果都失败了，生成带数字后缀的名字
         base_name = self._generate_name_with_rules(character_type, requirements)
         unique_name = f"{base_name}{random.randint(10, 99)}"
-        self.used_names.add(unique_name)
+        self._remember_name(unique_name)
         return unique_name
 
+    def _remember_name(self, name: str):
+        """记录已使用的名字：集合用于查重，双端队列保存提示词中的最近名字"""
+        self.used_names.add(name)
+        self.recent_names.append(name)
+
     async def _generate_name_with_llm(self, character_type: str, genre: str,
                                       requirements: Optional[Dict], seed: int) -> str:
         """使用LLM生成名字"""
@@ -360,7 +448,7 @@ class CharacterCreator:
         - 性别：{gender}
         - 性格特征：{traits}
         - 风格：{creativity_hint}
-        - 绝对避免使用：{list(self.used_names)}
+        - 绝对避免使用：{list(self.recent_names)}
         - 要求原创性，不能是常见的网络小说角色名
         - 名字要有文化内涵和美感
         - 符合{genre}世界观
@@ -387,23 +475,18 @@ class CharacterCreator:
         # 选择姓氏
         surname = random.choice(self.name_banks["surnames"])
 
-        # 根据性别选择名字
-        if gender == "male":
-            given_pool = self.name_banks["male_given"]
-        elif gender == "female":
-            given_pool = self.name_banks["female_given"]
-        else:
-            given_pool = self.name_banks["male_given"] + self.name_banks["female_given"]
+        # 根据性别选择预先拆分好的名字池
+        single_chars, compound_names = self.given_name_pools.get(
+            gender, self.given_name_pools["any"])
 
         # 生成名字
         if random.random() < 0.6:  # 60%概率双字名
             if random.random() < 0.3:  # 30%概率用预定义组合
-                given_name = random.choice([n for n in given_pool if len(n) > 1])
+                given_name = random.choice(compound_names)
             else:  # 70%概率随机组合单字
-                single_chars = [n for n in given_pool if len(n) == 1]
-                given_name = random.choice(single_chars) + random.choice(single_chars)
+                given_name = "".join(random.choices(single_chars, k=2))
         else:  # 40%概率单字名
-            given_name = random.choice([n for n in given_pool if len(n) == 1])
+            given_name = random.choice(single_chars)
 
         return surname + given_name
 
@@ -414,8 +497,7 @@ class CharacterCreator:
         cleaned = response.strip()
 
         # 移除常见前缀
-        prefixes = ["名字：", "姓名：", "角色名：", "建议：", "推荐："]
-        for prefix in prefixes:
+        for prefix in _NAME_PREFIXES:
             if cleaned.startswith(prefix):
                 cleaned = cleaned[len(prefix):].strip()
 
@@ -461,14 +543,69 @@ class CharacterCreator:
 
     def _generate_character_arc_description(self, character_type: str) -> str:
         """生成角色弧线描述"""
-        arc_templates = {
-            "主角": "从平凡到非凡的成长历程",
-            "重要配角": "与主角并肩成长的伙伴之路",
-            "反派": "从对立到可能的救赎",
-            "导师": "传承智慧与最终的告别",
-            "爱情线角色": "情感的萌芽与深化"
-        }
-        return arc_templates.get(character_type, "角色的发展轨迹")
+        return _ARC_TEMPLATES.get(character_type, "角色的发展轨迹")
+
+    async def _generate_details_bulk(
+        self,
+        basic_info: Dict,
+        character_type: str,
+        genre: str,
+        world_setting: Optional[Dict]
+    ) -> Optional[Tuple[CharacterAppearance, CharacterPersonality,
+                        CharacterBackground, CharacterAbilities]]:
+        """一次LLM请求合并生成外貌、性格、背景、能力
+
+        共享的角色与世界观信息只发送一次；任一部分缺失或解析失败时返回None，由调用方分项生成
+        """
+        section_lines = "\n".join(
+            f"        - {section}: {', '.join(names)}"
+            for section, names in _DETAIL_SECTION_FIELDS.items()
+        )
+        prompt = f"""
+        为{genre}小说中的{character_type}角色「{basic_info["name"]}」一次性设计完整的人物设定。
+
+        角色概述：{basic_info.get("brief_description", "")}
+        故事作用：{basic_info.get("story_role", "")}
+        世界设定：{world_setting or "标准玄幻世界"}
+
+        请以JSON格式返回一个对象，包含以下四个部分，每个部分也是JSON对象，字段如下：
+{section_lines}
+
+        要求：
+        - 每个字段都要具体详细，列表类字段至少给出3项
+        - 外貌、性格、背景、能力之间相互呼应，符合{genre}世界观
+        - 注意返回 JSON 格式正确，避免字符串中使用符号影响 JSON 解析
+        """
+
+        try:
+            response = await self.llm_service.generate_text(
+                prompt,
+                temperature=0.8,
+                max_tokens=4000
+            )
+        except Exception as e:
+            logger.warning(f"合并生成角色详情失败: {e}")
+            return None
+
+        data = json_utils.loads_llm_json(response.content)
+        if not isinstance(data, dict) or not all(
+            isinstance(data.get(section), dict) for section in _DETAIL_SECTION_FIELDS
+        ):
+            logger.warning("合并生成的角色详情不完整，改为分项生成")
+            return None
+
+        try:
+            return (
+                CharacterAppearance(
+                    **self._ensure_complete_appearance(data["appearance"], basic_info)),
+                CharacterPersonality(
+                    **self._ensure_complete_personality(data["personality"], character_type)),
+                CharacterBackground(**self._ensure_complete_background(data["background"])),
+                CharacterAbilities(**self._ensure_complete_abilities(data["abilities"], genre))
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"合并生成的角色详情无法解析: {e}")
+            return None
 
     async def _generate_appearance(self, basic_info: Dict,
                                    world_setting: Optional[Dict]) -> CharacterAppearance:
@@ -506,7 +643,7 @@ class CharacterCreator:
             temperature=0.8,  # 提高随机性
             max_tokens=800    # 增加token限制
         )
-        appearance_data = await self._parse_json_response(response.content)
+        appearance_data = self._parse_json_response(response.content)
         # 确保所有字段都有值
         appearance_data = self._ensure_complete_appearance(appearance_data, basic_info)
 
@@ -546,7 +683,7 @@ class CharacterCreator:
             max_tokens=1000
         )
 
-        personality_data = await self._parse_json_response(response.content)
+        personality_data = self._parse_json_response(response.content)
         personality_data = self._ensure_complete_personality(personality_data, character_type)
 
         return CharacterPersonality(**personality_data)
@@ -596,7 +733,7 @@ class CharacterCreator:
             max_tokens=1200
         )
 
-        background_data = await self._parse_json_response(response.content)
+        background_data = self._parse_json_response(response.content)
         background_data = self._ensure_complete_background(background_data)
 
         return CharacterBackground(**background_data)
@@ -643,12 +780,12 @@ class CharacterCreator:
             max_tokens=1200
         )
 
-        abilities_data = await self._parse_json_response(response.content)
+        abilities_data = self._parse_json_response(response.content)
         abilities_data = self._ensure_complete_abilities(abilities_data, genre)
 
         return CharacterAbilities(**abilities_data)
 
-    async def _parse_json_response(self, response: str) -> Dict[str, Any]:
+    def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """解析JSON响应 - 增强版"""
         import json
         import re
@@ -735,19 +872,9 @@ class CharacterCreator:
         """从文本中解析信息"""
         result = {}
 
-        # 基本模式匹配
-        patterns = {
-            'name': r'(?:姓名|名字|name)[：:]\s*([^\n,，]+)',
-            'gender': r'(?:性别|gender)[：:]\s*([^\n,，]+)',
-            'age': r'(?:年龄|age)[：:]\s*(\d+)',
-            'height': r'(?:身高|height)[：:]\s*([^\n,，]+)',
-            'personality': r'(?:性格|特质|personality)[：:]\s*([^\n]+)',
-            'background': r'(?:背景|出身|background)[：:]\s*([^\n]+)',
-            'abilities': r'(?:能力|技能|abilities)[：:]\s*([^\n]+)'
-        }
-
-        for key, pattern in patterns.items():
-            match = re.search(pattern, response, re.IGNORECASE)
+        # 基本模式匹配（正则已在模块级预编译）
+        for key, pattern in _TEXT_RESPONSE_PATTERNS.items():
+            match = pattern.search(response)
             if match:
                 result[key] = match.group(1).strip()
 
@@ -812,15 +939,8 @@ class CharacterCreator:
 
     def _ensure_complete_personality(self, data: Dict, character_type: str) -> Dict:
         """确保性格信息完整"""
-        type_traits = {
-            "主角": ["勇敢", "坚毅", "正义", "责任心强", "不服输"],
-            "反派": ["野心勃勃", "狡诈", "强势", "目标明确", "手段多样"],
-            "配角": ["忠诚", "可靠", "有特色", "支持主角", "各有所长"]
-        }
-
         defaults = {
-            "core_traits": type_traits.get(character_type,
-                                           ["平衡", "理性", "适应力强", "有原则", "善于学习"]),
+            "core_traits": list(_TYPE_TRAITS.get(character_type, _DEFAULT_TRAITS)),
             "strengths": ["聪明机智", "意志坚定"],
             "weaknesses": ["过于执着", "有时冲动"],
             "fears": ["失去重要的人", "实力不足"],
@@ -989,17 +1109,7 @@ class CharacterCreator:
 
     def _calculate_importance(self, character_type: str) -> int:
         """计算重要性"""
-        importance_map = {
-            "主角": 10,
-            "重要配角": 8,
-            "一般配角": 5,
-            "反派": 9,
-            "导师": 7,
-            "爱情线角色": 6,
-            "搞笑角色": 4,
-            "背景角色": 2
-        }
-        return importance_map.get(character_type, 5)
+        return _IMPORTANCE_MAP.get(character_type, 5)
 
 
 
@@ -48,7 +48,7 @@ class CharacterDevelopment:
     ) -> CharacterArc:
         """创建角色弧线"""
 
-        arc_data = await self._generate_character_arc(character, story_length)
+        arc_data = self._generate_character_arc(character, story_length)
 
         arc = CharacterArc(
             character_id=character['id'],
@@ -65,7 +65,7 @@ class CharacterDevelopment:
     ) -> PowerProgression:
         """创建实力发展路线"""
 
-        progression_data = await self._generate_power_progression(character, target_level)
+        progression_data = self._generate_power_progression(character, target_level)
 
         progression = PowerProgression(
             character_id=character['id'],
@@ -75,7 +75,7 @@ class CharacterDevelopment:
         self.power_progressions[character['id']] = progression
         return progression
 
-    async def _generate_character_arc(self, character: Dict, story_length: int) -> Dict[str, Any]:
+    def _generate_character_arc(self, character: Dict, story_length: int) -> Dict[str, Any]:
         """生成角色弧线"""
 
         return {
@@ -94,8 +94,7 @@ class CharacterDevelopment:
             "resolution": "成为更强的自己"
         }
 
-    async def _generate_power_progression(self, character: Dict, target_level: str) -> Dict[
-        str, Any]:
+    def _generate_power_progression(self, character: Dict, target_level: str) -> Dict[str, Any]:
         """生成实力发展"""
 
         return {
@@ -20,6 +20,22 @@ from modules.character.character_creator import (
 )
 from config.settings import get_settings
 
+# 质量检查用的静态词表，模块加载时构建一次
+_SIMPLE_INDICATORS = (
+    "待完善", "暂无", "无", "普通", "一般", "标准",
+    "默认", "基础", "简单", "常见", "平凡", "待补充",
+    "未知", "不详", "略", "省略", "..."
+)
+
+_RELEVANT_KEYWORDS = {
+    "appearance": ("外貌", "长相", "身高", "体型", "发型", "眼睛", "服装", "气质"),
+    "personality": ("性格", "特点", "习惯", "脾气", "态度", "价值观", "品格"),
+    "background": ("出身", "家庭", "经历", "过去", "成长", "教育", "事件"),
+    "abilities": ("能力", "技能", "修为", "实力", "天赋", "法术", "武功")
+}
+
+_WORD_RE = re.compile(r'\w+')
+
 
 class CharacterQualityChecker:
     """角色质量检查器"""
@@ -101,14 +117,8 @@ class CharacterQualityChecker:
 
     def _is_field_too_simple(self, field_name: str, field_data) -> bool:
         """检查字段内容是否过于简单"""
-        simple_indicators = [
-            "待完善", "暂无", "无", "普通", "一般", "标准",
-            "默认", "基础", "简单", "常见", "平凡", "待补充",
-            "未知", "不详", "略", "省略", "..."
-        ]
-
         content_str = str(field_data).lower()
-        return any(indicator in content_str for indicator in simple_indicators)
+        return any(indicator in content_str for indicator in _SIMPLE_INDICATORS)
 
     def _calculate_richness_score(self, field_data) -> float:
         """计算内容丰富度得分"""
@@ -118,7 +128,7 @@ class CharacterQualityChecker:
         length_score = min(1.0, len(content_str) / 200)
 
         # 词汇多样性评分
-        words = re.findall(r'\w+', content_str)
+        words = _WORD_RE.findall(content_str)
         unique_words = set(words)
         diversity_score = min(1.0, len(unique_words) / max(1, len(words))) if words else 0
 
@@ -135,15 +145,8 @@ class CharacterQualityChecker:
         """计算内容相关性得分"""
         content_str = str(field_data).lower()
 
-        # 根据字段类型定义相关关键词
-        relevant_keywords = {
-            "appearance": ["外貌", "长相", "身高", "体型", "发型", "眼睛", "服装", "气质"],
-            "personality": ["性格", "特点", "习惯", "脾气", "态度", "价值观", "品格"],
-            "background": ["出身", "家庭", "经历", "过去", "成长", "教育", "事件"],
-            "abilities": ["能力", "技能", "修为", "实力", "天赋", "法术", "武功"]
-        }
-
-        keywords = relevant_keywords.get(field_name, [])
+        # 根据字段类型查找相关关键词
+        keywords = _RELEVANT_KEYWORDS.get(field_name, ())
         if not keywords:
             return 0.8  # 默认相关性
 
@@ -279,21 +282,20 @@ class EnhancedCharacterCreator(CharacterCreator):
         )
         logger.info(f"生成基础信息: {basic_info.get('name', 'Unknown')}")
 
-        # 生成详细信息
-        appearance = await self._generate_appearance_enhanced(
-            basic_info, world_setting, temperature, max_tokens_bonus
-        )
-
-        personality = await self._generate_personality_enhanced(
-            basic_info, character_type, temperature, max_tokens_bonus
-        )
-
-        background = await self._generate_background_enhanced(
-            basic_info, world_setting, temperature, max_tokens_bonus
-        )
-
-        abilities = await self._generate_abilities_enhanced(
-            basic_info, genre, world_setting, temperature, max_tokens_bonus
+        # 生成详细信息，各部分只依赖基础信息，并发生成
+        appearance, personality, background, abilities = await asyncio.gather(
+            self._generate_appearance_enhanced(
+                basic_info, world_setting, temperature, max_tokens_bonus
+            ),
+            self._generate_personality_enhanced(
+                basic_info, character_type, temperature, max_tokens_bonus
+            ),
+            self._generate_background_enhanced(
+                basic_info, world_setting, temperature, max_tokens_bonus
+            ),
+            self._generate_abilities_enhanced(
+                basic_info, genre, world_setting, temperature, max_tokens_bonus
+            )
         )
 
         # 组装角色
@@ -358,7 +360,7 @@ class EnhancedCharacterCreator(CharacterCreator):
         response_text = await self._generate_with_retry_enhanced(
             prompt, temperature, 600 + max_tokens_bonus
         )
-        basic_info = await self._parse_json_response_enhanced(response_text)
+        basic_info = self._parse_json_response_enhanced(response_text)
 
         # 确保基础信息完整
         validate_user = await self._ensure_complete_basic_info(basic_info, character_type, genre)
@@ -405,7 +407,7 @@ class EnhancedCharacterCreator(CharacterCreator):
         response_text = await self._generate_with_retry_enhanced(
             prompt, temperature, 800 + max_tokens_bonus
         )
-        appearance_data = await self._parse_json_response_enhanced(response_text)
+        appearance_data = self._parse_json_response_enhanced(response_text)
         appearance_data = self._ensure_complete_appearance(appearance_data, basic_info)
 
         return CharacterAppearance(**appearance_data)
@@ -448,7 +450,7 @@ class EnhancedCharacterCreator(CharacterCreator):
         response_text = await self._generate_with_retry_enhanced(
             prompt, temperature, 1000 + max_tokens_bonus
         )
-        personality_data = await self._parse_json_response_enhanced(response_text)
+        personality_data = self._parse_json_response_enhanced(response_text)
         personality_data = self._ensure_complete_personality(personality_data, character_type)
 
         return CharacterPersonality(**personality_data)
@@ -503,7 +505,7 @@ class EnhancedCharacterCreator(CharacterCreator):
         response_text = await self._generate_with_retry_enhanced(
             prompt, temperature, 1200 + max_tokens_bonus
         )
-        background_data = await self._parse_json_response_enhanced(response_text)
+        background_data = self._parse_json_response_enhanced(response_text)
         background_data = self._ensure_complete_background(background_data)
 
         return CharacterBackground(**background_data)
@@ -555,7 +557,7 @@ class EnhancedCharacterCreator(CharacterCreator):
         response_text = await self._generate_with_retry_enhanced(
             prompt, temperature, 1200 + max_tokens_bonus
         )
-        abilities_data = await self._parse_json_response_enhanced(response_text)
+        abilities_data = self._parse_json_response_enhanced(response_text)
         abilities_data = self._ensure_complete_abilities(abilities_data, genre)
 
         return CharacterAbilities(**abilities_data)
@@ -587,13 +589,13 @@ class EnhancedCharacterCreator(CharacterCreator):
 
         raise Exception("生成失败，已达到最大重试次数")
 
-    async def _parse_json_response_enhanced(self, response: str) -> Dict[str, Any]:
+    def _parse_json_response_enhanced(self, response: str) -> Dict[str, Any]:
         """增强版JSON解析"""
         logger.debug(f"开始解析响应，长度: {len(response)}")
 
         # 使用原有的解析方法
         try:
-            return await self._parse_json_response(response)
+            return self._parse_json_response(response)
         except Exception as e:
             logger.error(f"JSON解析失败: {e}")
             # 返回空字典，让后续的完整性检查处理
@@ -660,7 +662,7 @@ class EnhancedCharacterCreator(CharacterCreator):
             prompt, temperature=0.9, max_tokens=800
         )
 
-        enhanced_data = await self._parse_json_response_enhanced(response.content)
+        enhanced_data = self._parse_json_response_enhanced(response.content)
 
         # 合并原有数据和增强数据
         for key, value in enhanced_data.items():
@@ -701,7 +703,7 @@ class EnhancedCharacterCreator(CharacterCreator):
             prompt, temperature=0.9, max_tokens=1000
         )
 
-        enhanced_data = await self._parse_json_response_enhanced(response.content)
+        enhanced_data = self._parse_json_response_enhanced(response.content)
 
         # 合并数据
         for key, value in enhanced_data.items():
@@ -733,7 +735,7 @@ class EnhancedCharacterCreator(CharacterCreator):
             prompt, temperature=0.9, max_tokens=1200
         )
 
-        enhanced_data = await self._parse_json_response_enhanced(response.content)
+        enhanced_data = self._parse_json_response_enhanced(response.content)
 
         # 合并数据，优先使用更详细的信息
         for key, value in enhanced_data.items():
@@ -769,7 +771,7 @@ class EnhancedCharacterCreator(CharacterCreator):
             prompt, temperature=0.9, max_tokens=1200
         )
 
-        enhanced_data = await self._parse_json_response_enhanced(response.content)
+        enhanced_data = self._parse_json_response_enhanced(response.content)
 
         # 合并数据
         for key, value in enhanced_data.items():
@@ -8,11 +8,16 @@ import re
 import json
 import hashlib
 import time
-from typing import Dict, Any, List, Optional, Set
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Set
 from dataclasses import dataclass
 from core.llm_client import get_llm_service
 
 
+# 提示词中列出的最近已用名字数量上限，避免提示词随生成数量无限增长
+_PROMPT_AVOID_NAME_LIMIT = 50
+
+
 @dataclass
 class NameConfig:
     """名称配置"""
@@ -27,9 +32,12 @@ class NameConfig:
 class ImprovedNameGenerator:
     """改进的名称生成器"""
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         self.llm_service = get_llm_service()
+        # 实例独立的随机数生成器，传入种子即可复现同一批名字，便于调试
+        self._rand = random.Random(seed)
         self.used_names: Set[str] = set()  # 已使用的名字
+        self.recent_names: Deque[str] = deque(maxlen=_PROMPT_AVOID_NAME_LIMIT)  # 提示词回避窗口
         self.name_patterns = self._load_name_patterns()
         self.syllable_banks = self._load_syllable_banks()
 
@@ -99,13 +107,13 @@ class ImprovedNameGenerator:
                 name = self._generate_with_syllables(config)
 
             if name and name not in self.used_names:
-                self.used_names.add(name)
+                self.add_used_name(name)
                 return name
 
         # 如果都失败了，生成一个独特的后缀名字
         base_name = await self._generate_with_llm(config, 0)
-        unique_name = f"{base_name}{random.randint(100, 999)}"
-        self.used_names.add(unique_name)
+        unique_name = f"{base_name}{self._rand.randint(100, 999)}"
+        self.add_used_name(unique_name)
         return unique_name
 
     async def _generate_with_llm(self, config: NameConfig, seed: int) -> str:
@@ -122,7 +130,7 @@ class ImprovedNameGenerator:
 
         # 添加时间戳和随机数增加唯一性
         timestamp = int(time.time() * 1000) % 10000
-        random_num = random.randint(1000, 9999)
+        random_num = self._rand.randint(1000, 9999)
 
         prompt = f"""
         {creativity_prompt}，要求：
@@ -135,7 +143,7 @@ class ImprovedNameGenerator:
         - 性格特征：{config.character_traits or []}
 
         创意要求：
-        1. 绝对不能使用这些已有名字：{list(config.avoid_names or []) + list(self.used_names)}
+        1. 绝对不能使用这些已有名字：{list(config.avoid_names or []) + list(self.recent_names)}
         2. 名字要体现{config.character_type}的特质
         3. 符合{config.cultural_style}的命名传统
         4. 音韵优美，朗朗上口
@@ -161,7 +169,7 @@ class ImprovedNameGenerator:
         patterns = self.name_patterns.get(config.cultural_style,
                                           self.name_patterns["中式古典"])
 
-        surname = random.choice(patterns["surnames"])
+        surname = self._rand.choice(patterns["surnames"])
 
         if config.gender == "male":
             given_names = patterns["male_names"]
@@ -171,15 +179,14 @@ class ImprovedNameGenerator:
             given_names = patterns["male_names"] + patterns["female_names"]
 
         # 随机选择单字名或双字名
-        if random.random() < 0.7:  # 70%概率生成双字名
-            if random.random() < 0.3:  # 30%概率使用预定义组合
-                given_name = random.choice([name for name in given_names if len(name) > 1])
-            else:  # 70%概率随机组合
-                char1 = random.choice([name for name in given_names if len(name) == 1])
-                char2 = random.choice([name for name in given_names if len(name) == 1])
-                given_name = char1 + char2
+        if self._rand.random() < 0.7:  # 70%概率生成双字名
+            if self._rand.random() < 0.3:  # 30%概率使用预定义组合
+                given_name = self._rand.choice([name for name in given_names if len(name) > 1])
+            else:  # 70%概率随机组合，一次抽取两个单字
+                single_chars = [name for name in given_names if len(name) == 1]
+                given_name = "".join(self._rand.choices(single_chars, k=2))
         else:  # 30%概率生成单字名
-            given_name = random.choice([name for name in given_names if len(name) == 1])
+            given_name = self._rand.choice([name for name in given_names if len(name) == 1])
 
         return surname + given_name
 
@@ -188,7 +195,7 @@ class ImprovedNameGenerator:
 
         patterns = self.name_patterns.get(config.cultural_style,
                                           self.name_patterns["中式古典"])
-        surname = random.choice(patterns["surnames"])
+        surname = self._rand.choice(patterns["surnames"])
 
         # 根据角色特征选择音节
         trait_categories = []
@@ -207,13 +214,13 @@ class ImprovedNameGenerator:
             trait_categories = ["自然", "优雅"]
 
         # 随机选择音节组合
-        category = random.choice(trait_categories)
+        category = self._rand.choice(trait_categories)
         syllables = self.syllable_banks[category]
 
-        if random.random() < 0.6:  # 60%概率双字名
-            given_name = random.choice(syllables) + random.choice(syllables)
+        if self._rand.random() < 0.6:  # 60%概率双字名
+            given_name = "".join(self._rand.choices(syllables, k=2))
         else:  # 40%概率单字名
-            given_name = random.choice(syllables)
+            given_name = self._rand.choice(syllables)
 
         return surname + given_name
 
@@ -255,17 +262,19 @@ class ImprovedNameGenerator:
         surnames = ["李", "王", "张", "刘", "陈", "杨", "赵", "黄"]
         chars = ["轩", "宇", "辰", "阳", "睿", "瑜", "煜", "炎", "羽", "翔"]
 
-        surname = random.choice(surnames)
-        given = random.choice(chars) + random.choice(chars)
+        surname = self._rand.choice(surnames)
+        given = "".join(self._rand.choices(chars, k=2))
         return surname + given
 
     def clear_used_names(self):
         """清空已使用的名字记录"""
         self.used_names.clear()
+        self.recent_names.clear()
 
     def add_used_name(self, name: str):
         """添加已使用的名字"""
         self.used_names.add(name)
+        self.recent_names.append(name)
 
 
 # 修改 CharacterCreator 类中的相关方法
@@ -6,7 +6,8 @@
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
-from core.base_tools import AsyncTool, ToolDefinition, ToolParameter
+from core.base_tools import AsyncTool, DATACLASS_SLOTS, ToolDefinition, ToolParameter
+from core.cache_manager import cached, get_cache_manager
 from core.llm_client import get_llm_service
 
 
@@ -22,7 +23,15 @@ class RelationshipType(Enum):
     POLITICAL = "政治关系"
 
 
-@dataclass
+def _relationship_type_key(manager, char1: Dict, char2: Dict) -> str:
+    """关系类型缓存键，只取影响判断结果的姓名与角色类型"""
+    return get_cache_manager().generate_cache_key(
+        char1.get('name', ''), char1.get('character_type', ''),
+        char2.get('name', ''), char2.get('character_type', '')
+    )
+
+
+@dataclass(**DATACLASS_SLOTS)
 class Relationship:
     """角色关系"""
     id: str
@@ -56,7 +65,7 @@ class RelationshipManager:
         if not relationship_type:
             relationship_type = await self._determine_relationship_type(char1, char2)
 
-        relationship_data = await self._generate_relationship_details(
+        relationship_data = self._generate_relationship_details(
             char1, char2, relationship_type
         )
 
@@ -72,7 +81,11 @@ class RelationshipManager:
 
     async def _determine_relationship_type(self, char1: Dict, char2: Dict) -> str:
         """确定关系类型"""
-        # 基于角色特征自动确定关系类型
+        return await self._classify_relationship_with_llm(char1, char2)
+
+    @cached("relationship_type", key_func=_relationship_type_key)
+    async def _classify_relationship_with_llm(self, char1: Dict, char2: Dict) -> str:
+        """基于角色特征由LLM判断关系类型，相同角色组合的结果会被缓存"""
         prompt = f"""
         基于以下两个角色的信息，判断他们最可能的关系类型：
 
@@ -87,7 +100,7 @@ class RelationshipManager:
         response = await self.llm_service.generate_text(prompt)
         return response.content.strip()
 
-    async def _generate_relationship_details(
+    def _generate_relationship_details(
         self,
         char1: Dict,
         char2: Dict,
@@ -62,6 +62,24 @@ class DiversityEnhancer:
         self.tones = self._load_tones()
         self.unique_elements = self._load_unique_elements()
 
+        # 为结构/原型/风味各分配一个位，回避判断用位掩码代替逐项的集合查找
+        self._structure_bits = self._build_bit_index(self.story_structures)
+        self._archetype_bits = self._build_bit_index(self.character_archetypes)
+        self._flavor_bits = self._build_bit_index(self.world_flavors)
+
+    @staticmethod
+    def _build_bit_index(options: Dict[str, Any]) -> Dict[str, int]:
+        """为每个选项分配一个独立的位"""
+        return {key: 1 << i for i, key in enumerate(options)}
+
+    @staticmethod
+    def _available_options(bit_index: Dict[str, int], avoid: Optional[Set[str]]) -> List[str]:
+        """返回未被回避的选项"""
+        avoid_mask = 0
+        for key in avoid or ():
+            avoid_mask |= bit_index.get(key, 0)
+        return [key for key, bit in bit_index.items() if not avoid_mask & bit]
+
     def _load_story_structures(self) -> Dict[str, Dict[str, Any]]:
         """加载多样化的故事结构"""
         return {
@@ -271,12 +289,12 @@ class DiversityEnhancer:
         constraints = constraints or DiversityConstraints()
 
         # 避免重复选择
-        available_structures = [s for s in self.story_structures.keys()
-                                if s not in (constraints.avoid_structures or set())]
-        available_archetypes = [a for a in self.character_archetypes.keys()
-                                if a not in (constraints.avoid_characters or set())]
-        available_flavors = [f for f in self.world_flavors.keys()
-                             if f not in (constraints.avoid_settings or set())]
+        available_structures = self._available_options(self._structure_bits,
+                                                       constraints.avoid_structures)
+        available_archetypes = self._available_options(self._archetype_bits,
+                                                       constraints.avoid_characters)
+        available_flavors = self._available_options(self._flavor_bits,
+                                                    constraints.avoid_settings)
 
         # 随机选择核心元素
         structure = random.choice(available_structures)
@@ -5,11 +5,12 @@
 与config_manager集成，使用全局配置
 """
 
+import asyncio
 import random
-import json
 import re
 import time
-from typing import Dict, Any, List, Optional, Set
+from itertools import combinations
+from typing import Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 
 from loguru import logger
@@ -22,6 +23,47 @@ from core.tool_registry import get_tool_registry
 from modules.character import CharacterCreator, CharacterCreatorTool
 from modules.generation.diversity_enhancer import DiversityEnhancer, GenerationVariant
 
+# 章节写作提示词模板，模块加载时构建一次，生成时通过format_map填充
+_CHAPTER_PROMPT_TEMPLATE = """
+        写作小说第{chapter_number}章：{chapter_title}
+
+        故事背景：
+        - 主题：{base_theme}
+        - 世界：{world_flavor}
+        - 基调：{tone}
+        - 冲突：{conflict_type}
+
+        角色信息：
+        {character_roster}
+
+        情节大纲：{plot_summary}
+
+        创新要求：
+        - 本章重点展现：{chapter_innovations}
+        - 叙述技法：{narrative_technique}
+        - 技法应用：{technique_application}
+        - 独特元素融入：{unique_element}
+        - 复杂度要求：{narrative_complexity}
+
+        写作要求：
+        1. 字数：{word_count}字左右
+        2. 严格按照情节大纲发展
+        3. 巧妙融入创新元素，不要生硬
+        4. 运用指定的叙述技法
+        5. 角色行为符合其设定
+        6. 语言风格符合{world_flavor}
+        7. 场景描写生动有画面感
+        8. 对话自然符合角色性格
+        9. 情节推进自然流畅
+        10. 避免常见俗套写法
+
+        请直接开始写作正文：
+        """
+
+# 叙述技法应用方式按章节位置分类的关键词
+_OPENING_MARKERS = ("开场", "介绍")
+_ENDING_MARKERS = ("结尾", "总结")
+
 
 @dataclass
 class EnhancedStoryConfig:
@@ -55,6 +97,8 @@ class EnhancedStoryGenerator:
         self.character_innovations = self._load_character_innovations()
         self.plot_twists = self._load_plot_twists()
         self.world_building_innovations = self._load_world_innovations()
+        # 技法名 -> (开篇, 中间, 结尾) 适用的应用方式，首次使用时分类一次
+        self._technique_phase_index: Dict[str, Tuple[List[str], List[str], List[str]]] = {}
 
         # 添加名称管理
         self.used_names: Set[str] = set()
@@ -220,8 +264,8 @@ class EnhancedStoryGenerator:
         # 生成多样性变体（使用正确的方法名）
         variant = await self.diversity_enhancer.generate_diverse_variant(base_theme, constraints)
 
-        # 选择创新因子（考虑配置）
-        available_factors = self.enhanced_config.default_innovation_factors.copy()
+        # 选择创新因子（考虑配置）；random.sample 返回新列表、不修改原序列，无需先复制
+        available_factors = self.enhanced_config.default_innovation_factors
 
         # 根据创新强度调整因子数量
         intensity_map = {"low": 1, "medium": 2, "high": 3}
@@ -543,6 +587,8 @@ class EnhancedStoryGenerator:
     ) -> Dict[str, Any]:
         """生成增强的章节内容"""
 
+        character_roster = self.format_character_roster(characters)
+
         chapter_number = chapter_info.get("number", 1)
         chapter_title = chapter_info.get("title", f"第{chapter_number}章")
 
@@ -554,41 +600,22 @@ class EnhancedStoryGenerator:
         narrative_technique = plot_outline.get("narrative_technique")
         technique_application = self._get_technique_application(narrative_technique, chapter_number)
 
-        chapter_prompt = f"""
-        写作小说第{chapter_number}章：{chapter_title}
-
-        故事背景：
-        - 主题：{config.base_theme}
-        - 世界：{config.variant.world_flavor}
-        - 基调：{config.variant.tone}
-        - 冲突：{config.variant.conflict_type}
-
-        角色信息：
-        {json.dumps([char.get("name", "未知") + ": " + char.get("role", "") for char in characters], ensure_ascii=False)}
-
-        情节大纲：{chapter_info.get("plot_summary", "")}
-
-        创新要求：
-        - 本章重点展现：{chapter_innovations}
-        - 叙述技法：{narrative_technique}
-        - 技法应用：{technique_application}
-        - 独特元素融入：{random.choice(config.variant.unique_elements)}
-        - 复杂度要求：{config.narrative_complexity}
-
-        写作要求：
-        1. 字数：{config.word_count_per_chapter}字左右
-        2. 严格按照情节大纲发展
-        3. 巧妙融入创新元素，不要生硬
-        4. 运用指定的叙述技法
-        5. 角色行为符合其设定
-        6. 语言风格符合{config.variant.world_flavor}
-        7. 场景描写生动有画面感
-        8. 对话自然符合角色性格
-        9. 情节推进自然流畅
-        10. 避免常见俗套写法
-
-        请直接开始写作正文：
-        """
+        chapter_prompt = _CHAPTER_PROMPT_TEMPLATE.format_map({
+            "chapter_number": chapter_number,
+            "chapter_title": chapter_title,
+            "base_theme": config.base_theme,
+            "world_flavor": config.variant.world_flavor,
+            "tone": config.variant.tone,
+            "conflict_type": config.variant.conflict_type,
+            "character_roster": character_roster,
+            "plot_summary": chapter_info.get("plot_summary", ""),
+            "chapter_innovations": chapter_innovations,
+            "narrative_technique": narrative_technique,
+            "technique_application": technique_application,
+            "unique_element": random.choice(config.variant.unique_elements),
+            "narrative_complexity": config.narrative_complexity,
+            "word_count": config.word_count_per_chapter,
+        })
 
         chapter_response = await self.llm_service.generate_text(
             chapter_prompt,
@@ -608,22 +635,44 @@ class EnhancedStoryGenerator:
             "config_used": asdict(config)
         }
 
+    @staticmethod
+    def format_character_roster(characters: List[Dict[str, Any]]) -> str:
+        """将角色列表拼接为提示词中使用的角色信息文本"""
+        return "、".join(
+            f"{char.get('name', '未知')}: {char.get('role', '')}" for char in characters
+        )
+
     def _get_technique_application(self, technique: str, chapter_number: int) -> str:
         """获取叙述技法的具体应用"""
         if not technique or technique not in self.narrative_techniques:
             return "常规叙述"
 
-        implementations = self.narrative_techniques[technique]["implementation"]
+        opening, middle, ending = self._get_technique_phases(technique)
 
         # 根据章节位置选择合适的应用方式
         if chapter_number <= 3:  # 开篇
-            suitable = [impl for impl in implementations if "开场" in impl or "介绍" in impl]
+            return random.choice(opening)
         elif chapter_number >= 15:  # 结尾
-            suitable = [impl for impl in implementations if "结尾" in impl or "总结" in impl]
+            return random.choice(ending)
         else:  # 中间
-            suitable = implementations
+            return random.choice(middle)
 
-        return random.choice(suitable if suitable else implementations)
+    def _get_technique_phases(self, technique: str) -> Tuple[List[str], List[str], List[str]]:
+        """按章节位置分类技法的应用方式
+
+        每章都会查询，分类结果按技法缓存，避免逐章对全部应用方式做子串匹配；
+        没有匹配项的位置回退到全部应用方式
+        """
+        phases = self._technique_phase_index.get(technique)
+        if phases is None:
+            implementations = self.narrative_techniques[technique]["implementation"]
+            opening = [impl for impl in implementations
+                       if any(marker in impl for marker in _OPENING_MARKERS)]
+            ending = [impl for impl in implementations
+                      if any(marker in impl for marker in _ENDING_MARKERS)]
+            phases = (opening or implementations, implementations, ending or implementations)
+            self._technique_phase_index[technique] = phases
+        return phases
 
 
 class EnhancedStoryGeneratorTool(AsyncTool):
@@ -740,29 +789,33 @@ class EnhancedStoryGeneratorTool(AsyncTool):
                         ("background", "背景角色")
                     ]
 
-                    # 按优先级生成角色
-                    for i in range(character_count):
-                        if i < len(role_types):
-                            role_type, role_name = role_types[i]
+                    # 按优先级确定各角色类型，超过预定义类型时生成背景角色
+                    role_plan = [
+                        role_types[i] if i < len(role_types)
+                        else ("background", f"配角{i - len(role_types) + 1}")
+                        for i in range(character_count)
+                    ]
+
+                    # 各角色互不依赖，并发请求LLM（并发上限由LLM客户端统一控制）
+                    results = await asyncio.gather(
+                        *(self.generator.generate_enhanced_character(config, role_type)
+                          for role_type, _ in role_plan),
+                        return_exceptions=True
+                    )
+
+                    # 按计划顺序收集结果，保持角色ID与优先级一致
+                    for i, ((_, role_name), character) in enumerate(zip(role_plan, results)):
+                        if isinstance(character, Exception):
+                            logger.error(f"生成{role_name}失败: {character}")
+                        elif character:
+                            # 确保角色有正确的类型标记
+                            character['character_type'] = role_name
+                            character['id'] = f"char_{i + 1:03d}"  # 生成唯一ID
+                            characters.append(character)
+                            logger.info(
+                                f"✅ 角色生成完成: {character.get('name', '未命名')} ({role_name})")
                         else:
-                            # 超过预定义类型时，生成背景角色
-                            role_type = "background"
-                            role_name = f"配角{i - len(role_types) + 1}"
-
-                        try:
-                            character = await self.generator.generate_enhanced_character(config,
-                                                                                         role_type)
-                            if character:
-                                # 确保角色有正确的类型标记
-                                character['character_type'] = role_name
-                                character['id'] = f"char_{i + 1:03d}"  # 生成唯一ID
-                                characters.append(character)
-                                logger.info(
-                                    f"✅ 角色生成完成: {character.get('name', '未命名')} ({role_name})")
-                            else:
-                                logger.warning(f"角色生成失败: {role_name}")
-                        except Exception as e:
-                            logger.error(f"生成{role_name}失败: {e}")
+                            logger.warning(f"角色生成失败: {role_name}")
 
                     if not characters:
                         logger.warning("未生成任何角色，使用默认角色")
@@ -792,22 +845,24 @@ class EnhancedStoryGeneratorTool(AsyncTool):
                             # 生成主要角色之间的关系
                             main_characters = characters[:min(5, len(characters))]  # 只为前5个主要角色生成关系
 
-                            for i in range(len(main_characters)):
-                                for j in range(i + 1, len(main_characters)):
-                                    try:
-                                        rel_result = await relationship_tool.execute({
-                                            "action": "create",
-                                            "character1": main_characters[i],
-                                            "character2": main_characters[j]
-                                        })
-
-                                        if rel_result and "relationship" in rel_result:
-                                            relationships.append(rel_result["relationship"])
-                                            logger.info(
-                                                f"✅ 关系生成: {main_characters[i]['name']} ↔ {main_characters[j]['name']}")
-
-                                    except Exception as e:
-                                        logger.error(f"生成关系失败: {e}")
+                            # 各角色对的关系互不依赖，并发生成（并发上限由LLM客户端统一控制）
+                            pairs = list(combinations(main_characters, 2))
+                            rel_results = await asyncio.gather(
+                                *(relationship_tool.execute({
+                                    "action": "create",
+                                    "character1": char1,
+                                    "character2": char2
+                                }) for char1, char2 in pairs),
+                                return_exceptions=True
+                            )
+
+                            for (char1, char2), rel_result in zip(pairs, rel_results):
+                                if isinstance(rel_result, Exception):
+                                    logger.error(f"生成关系失败: {rel_result}")
+                                elif rel_result and "relationship" in rel_result:
+                                    relationships.append(rel_result["relationship"])
+                                    logger.info(
+                                        f"✅ 关系生成: {char1['name']} ↔ {char2['name']}")
 
                         logger.info(f"✅ 生成了 {len(relationships)} 个角色关系")
                     else:
@@ -822,7 +877,9 @@ class EnhancedStoryGeneratorTool(AsyncTool):
                     logger.info("开始生成情节大纲...")
                     plot_outline = await self.generator.generate_enhanced_plot_outline(config,
                                                                                        chapter_count)
-                    logger.info(f"✅ 情节大纲生成完成{plot_outline}")
+                    logger.info("✅ 情节大纲生成完成")
+                    # 大纲内容较大，仅在DEBUG级别输出时才格式化
+                    logger.opt(lazy=True).debug("情节大纲: {}", lambda: plot_outline)
 
                 except Exception as e:
                     logger.error(f"情节大纲生成失败: {e}")
@@ -833,34 +890,38 @@ class EnhancedStoryGeneratorTool(AsyncTool):
                     logger.info("开始生成章节内容...")
                     chapters = []
                     chapter_writer = self.tool_registry.get_tool("chapter_writer")
-                    for i in range(min(chapter_count, 3)):  # 限制为前3章以节省时间
-                        try:
-                            chapter_info = {"number": i+1, "title": "开篇", "content": "故事从这里开始..."}
-
-                            # 基本使用
-                            chapter = await chapter_writer.execute({
-                                "chapter_info": {
-                                    "number": i+1,
-                                    "title": "初入江湖",
-                                    "summary": "主角踏入修仙世界",
-                                    "target_word_count": 3000
-                                },
-                                "story_context": {
-                                    "characters": characters,
-                                    "world_setting": plot_outline
-                                },
-                                "scene_count": 4,
-                                "writing_style": "traditional"
-                            })
-
-                            # chapter = await self.generator.generate_enhanced_chapter(
-                            #     config, chapter_info, characters,plot_outline
-                            # )
-                            if chapter:
-                                chapters.append(chapter)
-                                logger.info(f"✅ 第{i + 1}章生成完成")
-                        except Exception as e:
-                            logger.error(f"第{i + 1}章生成失败: {e}")
+                    chapter_numbers = range(1, min(chapter_count, 3) + 1)  # 限制为前3章以节省时间
+
+                    # 各章输入互不依赖，并发生成（并发上限由LLM客户端统一控制）
+                    chapter_results = await asyncio.gather(
+                        *(chapter_writer.execute({
+                            "chapter_info": {
+                                "number": number,
+                                "title": "初入江湖",
+                                "summary": "主角踏入修仙世界",
+                                "target_word_count": 3000
+                            },
+                            "story_context": {
+                                "characters": characters,
+                                "world_setting": plot_outline
+                            },
+                            "scene_count": 4,
+                            "writing_style": "traditional"
+                        }) for number in chapter_numbers),
+                        return_exceptions=True
+                    )
+
+                    # chapter = await self.generator.generate_enhanced_chapter(
+                    #     config, chapter_info, characters,plot_outline
+                    # )
+
+                    # gather按提交顺序返回，章节顺序保持不变
+                    for number, chapter in zip(chapter_numbers, chapter_results):
+                        if isinstance(chapter, Exception):
+                            logger.error(f"第{number}章生成失败: {chapter}")
+                        elif chapter:
+                            chapters.append(chapter)
+                            logger.info(f"✅ 第{number}章生成完成")
 
                     if not chapters:
                         chapters = [{"number": 1, "title": "开篇", "content": "故事从这里开始..."}]
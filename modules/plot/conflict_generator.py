@@ -67,7 +67,7 @@ class ConflictGenerator:
     ) -> Conflict:
         """生成核心冲突"""
 
-        conflict_data = await self._generate_conflict_data(
+        conflict_data = self._generate_conflict_data(
             "核心冲突", ConflictType.CHARACTER_VS_CHARACTER.value,
             protagonist, antagonist, genre, theme, severity=10
         )
@@ -82,7 +82,7 @@ class ConflictGenerator:
     ) -> Conflict:
         """生成内心冲突"""
 
-        conflict_data = await self._generate_conflict_data(
+        conflict_data = self._generate_conflict_data(
             "内心冲突", ConflictType.CHARACTER_VS_SELF.value,
             character, "内心的恐惧与欲望", "心理", "成长", severity=7
         )
@@ -97,7 +97,7 @@ class ConflictGenerator:
     ) -> Conflict:
         """生成社会冲突"""
 
-        conflict_data = await self._generate_conflict_data(
+        conflict_data = self._generate_conflict_data(
             "社会冲突", ConflictType.CHARACTER_VS_SOCIETY.value,
             character, "社会制度", "社会", "正义", severity=8
         )
@@ -128,7 +128,7 @@ class ConflictGenerator:
         for i in range(remaining_count):
             conflict_type = list(ConflictType)[i % len(ConflictType)]
 
-            conflict_data = await self._generate_conflict_data(
+            conflict_data = self._generate_conflict_data(
                 f"冲突{i + 1}", conflict_type.value,
                 story_outline.get("protagonist", "主角"),
                 f"对立面{i + 1}",
@@ -141,7 +141,7 @@ class ConflictGenerator:
 
         return conflicts
 
-    async def _generate_conflict_data(
+    def _generate_conflict_data(
         self,
         name: str,
         conflict_type: str,
@@ -4,12 +4,18 @@
 负责生成故事大纲和章节规划
 """
 
+import hashlib
 import re
-import json
-from typing import Dict, Any, List, Optional
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
+from loguru import logger
 from core.base_tools import AsyncTool, ToolDefinition, ToolParameter
+from core.cache_manager import cached
+from core import json_utils
+from core.json_utils import loads_llm_json
 from core.llm_client import get_llm_service
 from config.settings import get_prompt_manager
 
@@ -106,6 +112,38 @@ class StoryOutline:
     motifs: List[str]
 
 
+# 紧张程度下限 -> 章节氛围，按阈值从高到低匹配
+_TENSION_MOODS = (
+    (8, "紧张刺激"),
+    (6, "严肃专注"),
+    (4, "轻松活泼"),
+)
+
+# 从LLM响应中截取章节JSON数组，模块加载时编译一次
+_CHAPTERS_JSON_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+
+@lru_cache(maxsize=256)
+def _parse_chapter_range(range_str: str) -> Optional[Tuple[int, int]]:
+    """解析章节范围字符串（如 "3-8" 或 "5"），无法解析时返回None
+
+    同一批情节点会对每一章重复判断，缓存解析结果避免反复split/int
+    """
+    try:
+        if '-' in range_str:
+            start, end = map(int, range_str.split('-'))
+            return start, end
+        number = int(range_str)
+        return number, number
+    except (TypeError, ValueError):
+        return None
+
+
+def _chapter_plan_key(planner, prompt: str) -> str:
+    """章节规划缓存键：提示词已包含故事信息、情节点与章节数，取其摘要即可"""
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+
 class StoryPlanner:
     """故事规划器"""
 
@@ -131,7 +169,7 @@ class StoryPlanner:
         )
 
         # 生成情节结构
-        plot_points = await self._generate_plot_points(
+        plot_points = self._generate_plot_points(
             basic_info, structure, chapter_count
         )
 
@@ -141,7 +179,7 @@ class StoryPlanner:
         )
 
         # 生成子情节
-        subplots = await self._generate_subplots(
+        subplots = self._generate_subplots(
             basic_info, characters
         )
 
@@ -200,7 +238,7 @@ class StoryPlanner:
         - 反派：{antagonist_name}
 
         世界背景：{world_setting.get('culture_notes', '') if world_setting else ''}
-        角色信息：{json.dumps(characters, ensure_ascii=False) if characters else '[]'}
+        角色信息：{json_utils.dumps(characters) if characters else '[]'}
 
         请生成以JSON格式返回以下信息：
         {{
@@ -223,16 +261,13 @@ class StoryPlanner:
 
         response = await self.llm_service.generate_text(prompt, temperature=0.7)
 
-        try:
-            # 提取JSON部分
-            json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
-            if json_match:
-                parsed_info = json.loads(json_match.group())
-                return parsed_info
-        except:
-            pass
+        # 截取并解析JSON部分
+        parsed_info = loads_llm_json(response.content)
+        if isinstance(parsed_info, dict):
+            return parsed_info
 
         # 如果解析失败，返回默认值
+        logger.warning("基础故事信息解析失败，使用默认值")
         return {
             "theme": theme or "成长与冒险",
             "premise": f"在{world_name}中，{protagonist_name}展开冒险旅程",
@@ -250,7 +285,7 @@ class StoryPlanner:
             "motifs": ["旅程", "试炼", "觉醒"]
         }
 
-    async def _generate_plot_points(
+    def _generate_plot_points(
         self,
         basic_info: Dict,
         structure: str,
@@ -259,14 +294,13 @@ class StoryPlanner:
         """生成情节点"""
 
         if structure == "三幕式":
-            return await self._generate_three_act_points(basic_info, chapter_count)
+            return self._generate_three_act_points(basic_info, chapter_count)
         elif structure == "英雄之旅":
-            return await self._generate_hero_journey_points(basic_info, chapter_count)
+            return self._generate_hero_journey_points(basic_info, chapter_count)
         else:
-            return await self._generate_default_points(basic_info, chapter_count)
+            return self._generate_default_points(basic_info, chapter_count)
 
-    async def _generate_three_act_points(self, basic_info: Dict, chapter_count: int) -> List[
-        PlotPoint]:
+    def _generate_three_act_points(self, basic_info: Dict, chapter_count: int) -> List[PlotPoint]:
         """生成三幕式情节点"""
 
         act1_end = chapter_count // 4
@@ -331,10 +365,13 @@ class StoryPlanner:
             )
         ]
 
-    async def _generate_hero_journey_points(self, basic_info: Dict, chapter_count: int) -> List[
-        PlotPoint]:
+    def _generate_hero_journey_points(self, basic_info: Dict,
+                                      chapter_count: int) -> List[PlotPoint]:
         """生成英雄之旅情节点"""
 
+        first_third = chapter_count // 3
+        second_third = chapter_count * 2 // 3
+
         return [
             PlotPoint(
                 id="ordinary_world",
@@ -373,7 +410,7 @@ class StoryPlanner:
                 id="threshold",
                 name="跨越门槛",
                 description="正式踏入冒险世界",
-                chapter_range=f"7-{chapter_count // 3}",
+                chapter_range=f"7-{first_third}",
                 importance=8,
                 plot_function="世界转换",
                 characters_involved=[basic_info['protagonist']],
@@ -384,7 +421,7 @@ class StoryPlanner:
                 id="trials",
                 name="试炼考验",
                 description="面临各种挑战和考验",
-                chapter_range=f"{chapter_count // 3 + 1}-{chapter_count * 2 // 3}",
+                chapter_range=f"{first_third + 1}-{second_third}",
                 importance=9,
                 plot_function="角色锻炼",
                 characters_involved=[basic_info['protagonist'], "盟友", "敌人"],
@@ -395,7 +432,7 @@ class StoryPlanner:
                 id="ordeal",
                 name="最大考验",
                 description="面临最大的恐惧和挑战",
-                chapter_range=f"{chapter_count * 2 // 3 + 1}-{chapter_count - 2}",
+                chapter_range=f"{second_third + 1}-{chapter_count - 2}",
                 importance=10,
                 plot_function="最终考验",
                 characters_involved=[basic_info['protagonist'], basic_info['antagonist']],
@@ -415,10 +452,9 @@ class StoryPlanner:
             )
         ]
 
-    async def _generate_default_points(self, basic_info: Dict, chapter_count: int) -> List[
-        PlotPoint]:
+    def _generate_default_points(self, basic_info: Dict, chapter_count: int) -> List[PlotPoint]:
         """生成默认情节点"""
-        return await self._generate_three_act_points(basic_info, chapter_count)
+        return self._generate_three_act_points(basic_info, chapter_count)
 
     async def _generate_detailed_chapter_plan(
         self,
@@ -441,10 +477,10 @@ class StoryPlanner:
         - 核心冲突：{basic_info.get('central_conflict', '')}
 
         情节点：
-        {json.dumps([{"name": p.name, "description": p.description, "chapter_range": p.chapter_range} for p in plot_points], ensure_ascii=False, indent=2)}
+        {json_utils.dumps([{"name": p.name, "description": p.description, "chapter_range": p.chapter_range} for p in plot_points], indent=True)}
 
         角色信息：
-        {json.dumps([{"name": char.get("name", ""), "role": char.get("character_type", "")} for char in (characters or [])], ensure_ascii=False, indent=2)}
+        {json_utils.dumps([{"name": char.get("name", ""), "role": char.get("character_type", "")} for char in (characters or [])], indent=True)}
 
         请为每一章生成详细信息，返回JSON格式：
         [
@@ -480,21 +516,30 @@ class StoryPlanner:
         5. 确保情节点在相应章节体现
         """
 
-        response = await self.llm_service.generate_text(prompt, temperature=0.7, max_tokens=8000)
+        response_text = await self._request_chapter_plan(prompt)
 
         # 解析响应
-        chapters = self._parse_chapters_from_llm(response.content, chapter_count, plot_points)
+        chapters = self._parse_chapters_from_llm(response_text, chapter_count, plot_points)
 
         return chapters
 
+    @cached("chapter_plan", key_func=_chapter_plan_key)
+    async def _request_chapter_plan(self, prompt: str) -> str:
+        """请求章节规划，相同大纲重试或重新生成时直接复用上次的LLM响应
+
+        只缓存响应文本，每次重新解析出新的Chapter对象，避免调用方修改共享结果
+        """
+        response = await self.llm_service.generate_text(prompt, temperature=0.7, max_tokens=8000)
+        return response.content
+
     def _parse_chapters_from_llm(self, response: str, chapter_count: int,
                                  plot_points: List[PlotPoint]) -> List[Chapter]:
         """从LLM响应解析章节信息"""
         try:
             # 尝试提取JSON
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
+            json_match = _CHAPTERS_JSON_RE.search(response)
             if json_match:
-                chapters_data = json.loads(json_match.group())
+                chapters_data = json_utils.loads(json_match.group())
 
                 chapters = []
                 for i, chapter_data in enumerate(chapters_data):
@@ -522,24 +567,43 @@ class StoryPlanner:
                     chapters.append(chapter)
 
                 # 确保章节数量足够
-                while len(chapters) < chapter_count:
-                    chapters.append(self._create_default_chapter(len(chapters) + 1, plot_points))
+                if len(chapters) < chapter_count:
+                    points_by_chapter = self._index_plot_points_by_chapter(plot_points,
+                                                                           chapter_count)
+                    while len(chapters) < chapter_count:
+                        number = len(chapters) + 1
+                        chapters.append(self._create_default_chapter(
+                            number, points_by_chapter.get(number, [])))
 
                 return chapters[:chapter_count]
         except Exception as e:
             print(f"解析章节失败: {e}")
 
         # 如果解析失败，生成默认章节
-        return [self._create_default_chapter(i + 1, plot_points) for i in range(chapter_count)]
+        points_by_chapter = self._index_plot_points_by_chapter(plot_points, chapter_count)
+        return [self._create_default_chapter(i + 1, points_by_chapter.get(i + 1, []))
+                for i in range(chapter_count)]
 
-    def _create_default_chapter(self, chapter_number: int, plot_points: List[PlotPoint]) -> Chapter:
-        """创建默认章节"""
+    @staticmethod
+    def _index_plot_points_by_chapter(plot_points: List[PlotPoint],
+                                      chapter_count: int) -> Dict[int, List[PlotPoint]]:
+        """按章节号索引情节点（保持情节点原有顺序）
 
-        # 找到对应的情节点
-        relevant_points = [
-            point for point in plot_points
-            if self._is_chapter_in_range(chapter_number, point.chapter_range)
-        ]
+        一次遍历建立索引，避免为每一章重新扫描全部情节点
+        """
+        points_by_chapter: Dict[int, List[PlotPoint]] = defaultdict(list)
+        for point in plot_points:
+            bounds = _parse_chapter_range(point.chapter_range)
+            if bounds is None:
+                continue
+            start, end = bounds
+            for chapter in range(max(start, 1), min(end, chapter_count) + 1):
+                points_by_chapter[chapter].append(point)
+        return points_by_chapter
+
+    def _create_default_chapter(self, chapter_number: int,
+                                relevant_points: List[PlotPoint]) -> Chapter:
+        """创建默认章节（relevant_points 为覆盖该章的情节点）"""
 
         if relevant_points:
             main_point = relevant_points[0]
@@ -577,14 +641,11 @@ class StoryPlanner:
 
     def _is_chapter_in_range(self, chapter: int, range_str: str) -> bool:
         """判断章节是否在范围内"""
-        try:
-            if '-' in range_str:
-                start, end = map(int, range_str.split('-'))
-                return start <= chapter <= end
-            else:
-                return chapter == int(range_str)
-        except:
+        bounds = _parse_chapter_range(range_str)
+        if bounds is None:
             return False
+        start, end = bounds
+        return start <= chapter <= end
 
     def _calculate_tension_level(self, chapter: int, total_chapters: int) -> int:
         """计算紧张程度"""
@@ -612,17 +673,13 @@ class StoryPlanner:
 
     def _determine_mood(self, plot_points: List[PlotPoint], tension: int) -> str:
         """确定氛围"""
-        if tension >= 8:
-            return "紧张刺激"
-        elif tension >= 6:
-            return "严肃专注"
-        elif tension >= 4:
-            return "轻松活泼"
-        else:
-            return "平静祥和"
+        for threshold, mood in _TENSION_MOODS:
+            if tension >= threshold:
+                return mood
+        return "平静祥和"
 
-    async def _generate_subplots(self, basic_info: Dict, characters: List[Dict]) -> List[
-        Dict[str, str]]:
+    def _generate_subplots(self, basic_info: Dict,
+                           characters: List[Dict]) -> List[Dict[str, str]]:
         """生成子情节"""
 
         subplots = [
@@ -1,5 +1,4 @@
 # 增强版 save_story 方法
-import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
@@ -10,6 +9,40 @@ from modules.models import (
     NovelDAO, CharacterDAO, get_db_session
 )
 
+# 角色定位 -> (角色类型, 重要性)，模块加载时构建一次
+_ROLE_TYPE_IMPORTANCE = {
+    'protagonist': ('主角', 10),
+    'antagonist': ('反派', 9),
+    'deuteragonist': ('重要配角', 8),
+    'supporting': ('配角', 6),
+    'minor': ('次要角色', 4),
+    'background': ('背景角色', 2)
+}
+_DEFAULT_ROLE_TYPE_IMPORTANCE = ('配角', 5)
+
+# 世界风味 -> 世界类型 / 时代背景 / 科技水平
+_WORLD_TYPES = {
+    '古典仙侠': '修仙大陆',
+    '现代都市': '现代地球',
+    '蒸汽朋克': '蒸汽文明',
+    '末世废土': '后末日世界',
+    '奇幻大陆': '奇幻世界'
+}
+_TIME_PERIODS = {
+    '古典仙侠': '古代/神话时代',
+    '现代都市': '现代',
+    '蒸汽朋克': '维多利亚时代风格',
+    '末世废土': '后文明时代',
+    '奇幻大陆': '中世纪风格'
+}
+_TECH_LEVELS = {
+    '古典仙侠': '古代+修仙术法',
+    '现代都市': '现代科技',
+    '蒸汽朋克': '蒸汽机械科技',
+    '末世废土': '退化科技',
+    '奇幻大陆': '魔法替代科技'
+}
+
 
 class EnhancedStoryDAO:
     """增强版故事数据访问对象"""
@@ -342,15 +375,7 @@ class EnhancedStoryDAO:
 
     def _determine_character_type_and_importance(self, role: str) -> tuple:
         """确定角色类型和重要性"""
-        role_mapping = {
-            'protagonist': ('主角', 10),
-            'antagonist': ('反派', 9),
-            'deuteragonist': ('重要配角', 8),
-            'supporting': ('配角', 6),
-            'minor': ('次要角色', 4),
-            'background': ('背景角色', 2)
-        }
-        return role_mapping.get(role, ('配角', 5))
+        return _ROLE_TYPE_IMPORTANCE.get(role, _DEFAULT_ROLE_TYPE_IMPORTANCE)
 
     def _parse_character_appearance(self, char_data: Dict[str, Any]) -> Dict[str, Any]:
         """解析角色外貌信息"""
@@ -448,36 +473,15 @@ class EnhancedStoryDAO:
 
     def _determine_world_type(self, world_flavor: str) -> str:
         """确定世界类型"""
-        type_mapping = {
-            '古典仙侠': '修仙大陆',
-            '现代都市': '现代地球',
-            '蒸汽朋克': '蒸汽文明',
-            '末世废土': '后末日世界',
-            '奇幻大陆': '奇幻世界'
-        }
-        return type_mapping.get(world_flavor, '未知世界')
+        return _WORLD_TYPES.get(world_flavor, '未知世界')
 
     def _determine_time_period(self, world_flavor: str) -> str:
         """确定时代背景"""
-        period_mapping = {
-            '古典仙侠': '古代/神话时代',
-            '现代都市': '现代',
-            '蒸汽朋克': '维多利亚时代风格',
-            '末世废土': '后文明时代',
-            '奇幻大陆': '中世纪风格'
-        }
-        return period_mapping.get(world_flavor, '未知时代')
+        return _TIME_PERIODS.get(world_flavor, '未知时代')
 
     def _determine_tech_level(self, world_flavor: str) -> str:
         """确定科技水平"""
-        tech_mapping = {
-            '古典仙侠': '古代+修仙术法',
-            '现代都市': '现代科技',
-            '蒸汽朋克': '蒸汽机械科技',
-            '末世废土': '退化科技',
-            '奇幻大陆': '魔法替代科技'
-        }
-        return tech_mapping.get(world_flavor, '未知科技')
+        return _TECH_LEVELS.get(world_flavor, '未知科技')
 
     def _extract_magic_system(self, variant: Dict[str, Any]) -> Dict[str, Any]:
         """提取魔法/修炼体系"""
@@ -580,6 +584,8 @@ async def _save_json_backup(story_package: Dict[str, Any], novel_id: int):
     """保存JSON备份文件"""
     try:
         from pathlib import Path
+        import aiofiles
+        from core import json_utils
 
         # 创建备份目录
         backup_dir = Path("generated_novels/backups")
@@ -590,9 +596,10 @@ async def _save_json_backup(story_package: Dict[str, Any], novel_id: int):
         filename = f"novel_{novel_id}_{timestamp}.json"
         filepath = backup_dir / filename
 
-        # 保存备份文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(story_package, f, ensure_ascii=False, indent=2)
+        # 保存备份文件（异步写入，大型故事不阻塞事件循环）
+        data = json_utils.dumps_bytes(story_package, indent=True)
+        async with aiofiles.open(filepath, 'wb') as f:
+            await f.write(data)
 
         logger.info(f"📁 JSON备份已保存: {filepath}")
 
@@ -1,11 +1,38 @@
 # 保存小说内容为txt文件的完整实现
+import asyncio
 import os
 import re
+import shutil
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
 
+# 文件名中不允许出现的字符，模块加载时构建一次删除表
+_UNSAFE_FILENAME_TABLE = str.maketrans('', '', '<>:"/\\|?*')
+
+# 作品信息固定部分的模板，模块加载时构建一次
+_INFO_SECTION_TEMPLATE = (
+    "📋 作品信息\n"
+    "\n"
+    "作品名称：{title}\n"
+    "作品类型：{genre}\n"
+    "主要题材：{theme}\n"
+    "章节数量：{chapter_count} 章\n"
+    "角色数量：{character_count} 个\n"
+    "总计字数：约 {total_words:,} 字"
+)
+
+
+@lru_cache(maxsize=128)
+def safe_filename(title: str) -> str:
+    """移除标题中不能用于文件名的字符
+
+    同一标题会在检查点、txt与JSON备份等多个保存路径中重复处理，缓存结果
+    """
+    return title.translate(_UNSAFE_FILENAME_TABLE)
+
 
 class NovelTextFormatter:
     """小说文本格式化器"""
@@ -14,9 +41,27 @@ class NovelTextFormatter:
         self.line_separator = "\n" + "=" * 60 + "\n"
         self.chapter_separator = "\n" + "-" * 40 + "\n"
         self.section_separator = "\n" + "·" * 30 + "\n"
+        # 相邻两章之间的连接文本
+        self.chapter_joiner = "\n" + self.chapter_separator + "\n"
 
     def format_novel_content(self, story_package: Dict[str, Any]) -> str:
         """格式化完整小说内容"""
+        head, tail = self.format_novel_frame(story_package)
+        chapters = story_package.get('chapters', [])
+
+        if not chapters:
+            return head + "暂无章节内容。" + tail
+
+        body = self.chapter_joiner.join(
+            self.format_chapter(i, chapter) for i, chapter in enumerate(chapters, 1)
+        )
+        return head + body + tail
+
+    def format_novel_frame(self, story_package: Dict[str, Any]) -> Tuple[str, str]:
+        """格式化正文之外的部分，返回 (正文之前的文本, 正文之后的文本)
+
+        正文可以逐章单独格式化写入，最后再与前后两部分拼接
+        """
         content_parts = []
 
         # 1. 标题页
@@ -42,16 +87,15 @@ class NovelTextFormatter:
         # if outline_section:
         #     content_parts.append(outline_section)
 
-        # 6. 正文内容
-        main_content = self._format_main_content(story_package)
-        content_parts.append(main_content)
+        # 6. 正文内容标题，正文由 format_chapter 逐章生成
+        content_parts.append("📚 正文内容\n\n")
+        head = self.line_separator.join(content_parts)
 
         # 7. 生成信息（技术信息）
         generation_info = self._format_generation_info(story_package)
-        if generation_info:
-            content_parts.append(generation_info)
+        tail = self.line_separator + generation_info if generation_info else ""
 
-        return self.line_separator.join(content_parts)
+        return head, tail
 
     def _format_title_section(self, story_package: Dict[str, Any]) -> str:
         """格式化标题部分"""
@@ -83,29 +127,17 @@ class NovelTextFormatter:
 
     def _format_info_section(self, story_package: Dict[str, Any]) -> str:
         """格式化作品信息"""
-        lines = []
-        lines.append("📋 作品信息")
-        lines.append("")
-
-        # 基本信息
-        title = story_package.get('title', '未命名')
-        genre = story_package.get('genre', '未知')
-        theme = story_package.get('theme', '未知')
-
-        lines.append(f"作品名称：{title}")
-        lines.append(f"作品类型：{genre}")
-        lines.append(f"主要题材：{theme}")
-
-        # 章节统计
         chapters = story_package.get('chapters', [])
-        characters = story_package.get('characters', [])
-
-        lines.append(f"章节数量：{len(chapters)} 章")
-        lines.append(f"角色数量：{len(characters)} 个")
 
-        # 字数统计
-        total_words = sum(ch.get('word_count', len(ch.get('content', ''))) for ch in chapters)
-        lines.append(f"总计字数：约 {total_words:,} 字")
+        # 基本信息与统计通过模板一次格式化
+        lines = [_INFO_SECTION_TEMPLATE.format(
+            title=story_package.get('title', '未命名'),
+            genre=story_package.get('genre', '未知'),
+            theme=story_package.get('theme', '未知'),
+            chapter_count=len(chapters),
+            character_count=len(story_package.get('characters', [])),
+            total_words=sum(ch.get('word_count', len(ch.get('content', ''))) for ch in chapters)
+        )]
 
         # 生成配置信息
         config = story_package.get('config', {})
@@ -241,42 +273,30 @@ class NovelTextFormatter:
 
         return "\n".join(lines)
 
-    def _format_main_content(self, story_package: Dict[str, Any]) -> str:
-        """格式化正文内容"""
-        chapters = story_package.get('chapters', [])
-
-        if not chapters:
-            return "📚 正文内容\n\n暂无章节内容。"
-
+    def format_chapter(self, chapter_number: int, chapter: Dict[str, Any]) -> str:
+        """格式化单个章节（不含章节之间的分隔符，见 chapter_joiner）"""
         lines = []
-        lines.append("📚 正文内容")
+
+        # 章节标题
+        chapter_title = chapter.get('title', f'第{chapter_number}章')
+        lines.append(f"第{chapter_number}章  {chapter_title}")
         lines.append("")
 
-        for i, chapter in enumerate(chapters, 1):
-            # 章节标题
-            chapter_title = chapter.get('title', f'第{i}章')
-            lines.append(f"第{i}章  {chapter_title}")
+        # 章节摘要（如果有）
+        summary = chapter.get('summary', '')
+        if summary:
+            lines.append(f"【本章概要】{summary}")
             lines.append("")
 
-            # 章节摘要（如果有）
-            summary = chapter.get('summary', '')
-            if summary:
-                lines.append(f"【本章概要】{summary}")
-                lines.append("")
-
-            # 章节正文
-            content = chapter.get('content', '')
-            if content:
-                formatted_content = self._format_chapter_content(content)
-                lines.append(formatted_content)
-            else:
-                lines.append("（本章内容暂未生成）")
-
-            lines.append("")
+        # 章节正文
+        content = chapter.get('content', '')
+        if content:
+            formatted_content = self._format_chapter_content(content)
+            lines.append(formatted_content)
+        else:
+            lines.append("（本章内容暂未生成）")
 
-            # 章节分隔符
-            if i < len(chapters):
-                lines.append(self.chapter_separator)
+        lines.append("")
 
         return "\n".join(lines)
 
@@ -329,21 +349,24 @@ class NovelTextFormatter:
         # 清理文本
         text = re.sub(r'\s+', ' ', text.strip())
 
-        # 简单的换行处理
+        # 简单的换行处理：按词累积当前行，只记录长度，换行时再一次性拼接
         words = text.split(' ')
         lines = []
-        current_line = ""
+        current_words: List[str] = []
+        current_length = 0  # 含每个词后的空格
 
         for word in words:
-            if len(current_line + word) <= line_length:
-                current_line += word + " "
+            if current_length + len(word) <= line_length:
+                current_words.append(word)
+                current_length += len(word) + 1
             else:
-                if current_line:
-                    lines.append(current_line.strip())
-                current_line = word + " "
+                if current_words:
+                    lines.append(" ".join(current_words))
+                current_words = [word]
+                current_length = len(word) + 1
 
-        if current_line:
-            lines.append(current_line.strip())
+        if current_words:
+            lines.append(" ".join(current_words))
 
         return "\n".join(lines)
 
@@ -352,18 +375,12 @@ class NovelTextFormatter:
         if not content:
             return ""
 
-        # 分段处理
-        paragraphs = content.split('\n')
-        formatted_paragraphs = []
-
-        for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-            if paragraph:
-                # 添加适当的缩进
-                formatted_paragraph = "    " + paragraph
-                formatted_paragraphs.append(formatted_paragraph)
-
-        return "\n\n".join(formatted_paragraphs)
+        # 分段处理：跳过空行，每段添加缩进，一次join生成整章文本
+        return "\n\n".join(
+            "    " + paragraph
+            for paragraph in (line.strip() for line in content.split('\n'))
+            if paragraph
+        )
 
     def _truncate_text(self, text: str, max_length: int) -> str:
         """截断文本"""
@@ -372,6 +389,35 @@ class NovelTextFormatter:
         return text[:max_length - 3] + "..."
 
 
+def write_formatted_novel(story_package: Dict[str, Any], filepath: Path,
+                          formatter: Optional[NovelTextFormatter] = None) -> str:
+    """格式化小说并写入文件，返回格式化后的文本
+
+    格式化与写入都是同步操作，异步调用方应通过 asyncio.to_thread 在线程中执行
+    """
+    formatter = formatter or NovelTextFormatter()
+    content = formatter.format_novel_content(story_package)
+    filepath.write_text(content, encoding='utf-8')
+    return content
+
+
+def write_novel_with_body(story_package: Dict[str, Any], body_path: Path, filepath: Path,
+                          formatter: Optional[NovelTextFormatter] = None) -> None:
+    """将逐章写好的正文文件与标题、作品信息等部分拼接为完整小说文件
+
+    正文文件由 format_chapter 与 chapter_joiner 逐章生成，这里按块复制，
+    不在内存中拼出完整文本；同步操作，异步调用方应在线程中执行
+    """
+    formatter = formatter or NovelTextFormatter()
+    head, tail = formatter.format_novel_frame(story_package)
+
+    with open(filepath, 'w', encoding='utf-8') as out:
+        out.write(head)
+        with open(body_path, encoding='utf-8') as body:
+            shutil.copyfileobj(body, out, 1 << 20)
+        out.write(tail)
+
+
 async def save_novel_as_txt(story_package: Dict[str, Any], output_dir: str = "generated_novels") -> \
 Dict[str, Any]:
     """保存小说为txt文件"""
@@ -383,18 +429,15 @@ Dict[str, Any]:
         # 生成文件名
         title = story_package.get('title', '未命名小说')
         # 清理文件名中的特殊字符
-        safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
+        safe_title = safe_filename(title)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{safe_title}_{timestamp}.txt"
         filepath = output_path / filename
 
-        # 格式化小说内容
-        formatter = NovelTextFormatter()
-        formatted_content = formatter.format_novel_content(story_package)
-
-        # 保存文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(formatted_content)
+        # 格式化并保存文件（在线程中执行，避免阻塞事件循环）
+        formatted_content = await asyncio.to_thread(
+            write_formatted_novel, story_package, filepath
+        )
 
         # 计算文件统计
         file_size = filepath.stat().st_size
@@ -492,8 +535,8 @@ async def _save_story_enhanced(self, story: dict):
 async def _save_story_json_backup(self, story: dict):
     """JSON备份保存方法"""
     try:
-        import json
-        from datetime import datetime
+        import aiofiles
+        from core import json_utils
 
         # 创建保存目录
         save_dir = Path("generated_novels")
@@ -502,13 +545,14 @@ async def _save_story_json_backup(self, story: dict):
         # 生成文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         title = story.get('title', '未命名')
-        safe_title = re.sub(r'[<>:"/\\|?*]', '', title)
+        safe_title = safe_filename(title)
         filename = f"{safe_title}_backup_{timestamp}.json"
         filepath = save_dir / filename
 
-        # 保存文件
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(story, f, ensure_ascii=False, indent=2)
+        # 保存文件（异步写入，大型故事不阻塞事件循环）
+        data = json_utils.dumps_bytes(story, indent=True)
+        async with aiofiles.open(filepath, 'wb') as f:
+            await f.write(data)
 
         print(f"📁 JSON备份已保存: {filepath}")
 
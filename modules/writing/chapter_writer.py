@@ -13,6 +13,7 @@ from loguru import logger
 
 from core.abstract_tools import ContentGeneratorTool
 from core.base_tools import AsyncTool, ToolDefinition, ToolParameter
+from core import json_utils
 from core.cache_manager import cached
 from core.llm_client import get_llm_service
 from config.settings import get_prompt_manager
@@ -20,6 +21,9 @@ import asyncio
 import hashlib
 import time
 
+# 从LLM响应中截取场景规划JSON数组，模块加载时编译一次
+_SCENE_PLAN_JSON_RE = re.compile(r'\[.*\]', re.DOTALL)
+
 
 @dataclass
 class Scene:
@@ -284,9 +288,9 @@ class ChapterWriter:
         """从LLM响应解析场景规划"""
         try:
             # 尝试提取JSON
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
+            json_match = _SCENE_PLAN_JSON_RE.search(response)
             if json_match:
-                scenes_data = json.loads(json_match.group())
+                scenes_data = json_utils.loads(json_match.group())
 
                 scene_plan = []
                 for i, scene_data in enumerate(scenes_data):
@@ -492,7 +496,7 @@ class ChapterWriter:
                 cleaned_content = cleaned_content[json_start:json_end]
 
             # 解析JSON
-            parsed_data = json.loads(cleaned_content)
+            parsed_data = json_utils.loads(cleaned_content)
 
             # 确保返回列表
             if isinstance(parsed_data, dict):
@@ -29,6 +29,38 @@ class TestToolRegistry:
         assert "test_tool" in tool_registry.tools
         assert len(tool_registry.list_tools()) == 1
 
+    def test_registry_version(self, tool_registry):
+        """测试注册表版本号随工具增删递增"""
+
+        tool = (ToolBuilder()
+                .name("version_tool")
+                .description("版本测试工具")
+                .execute(lambda params, context: None)
+                .build())
+
+        initial_version = tool_registry.version
+        tool_registry.register(tool)
+        assert tool_registry.version == initial_version + 1
+
+        tool_registry.unregister("version_tool")
+        assert tool_registry.version == initial_version + 2
+
+    def test_list_by_category(self, tool_registry):
+        """测试按类别分组列出工具"""
+
+        for name, category in [("b_tool", "writing"), ("a_tool", "writing"), ("c_tool", "plot")]:
+            tool_registry.register(ToolBuilder()
+                                   .name(name)
+                                   .description("分组测试工具")
+                                   .category(category)
+                                   .execute(lambda params, context: None)
+                                   .build())
+
+        grouped = tool_registry.list_by_category()
+
+        assert [t.name for t in grouped["writing"]] == ["a_tool", "b_tool"]
+        assert [t.name for t in grouped["plot"]] == ["c_tool"]
+
     @pytest.mark.asyncio
     async def test_execute_tool(self, tool_registry):
         """测试工具执行"""
@@ -98,3 +130,120 @@ class TestMessage:
         assert message.content == "请帮我写一个故事"
         assert message.name is None
 
+
+class TestFunctionCallHandler:
+    """函数调用处理器测试"""
+
+    @pytest.mark.asyncio
+    async def test_call_function_non_str_keys(self):
+        """测试返回非字符串键字典的函数结果可正常序列化"""
+        from core.json_utils import loads
+        from core.llm_client import FunctionCallHandler
+
+        handler = FunctionCallHandler()
+        handler.register_function("chapter_titles", lambda: {1: "初入仙门"}, "章节标题", {})
+
+        result = await handler.call_function("chapter_titles", "")
+
+        assert loads(result) == {"1": "初入仙门"}
+
+
+class TestJsonUtils:
+    """JSON工具测试"""
+
+    def test_loads_llm_json_with_prose(self):
+        """测试从带说明文字的响应中解析JSON"""
+        from core.json_utils import loads_llm_json
+
+        response = '好的，以下是结果：\n{"theme": "成长", "symbols": ["剑"]}\n希望对你有帮助'
+
+        assert loads_llm_json(response) == {"theme": "成长", "symbols": ["剑"]}
+
+    def test_loads_llm_json_invalid(self):
+        """测试无法解析时返回None"""
+        from core.json_utils import loads_llm_json
+
+        assert loads_llm_json("没有JSON内容") is None
+        assert loads_llm_json('{"theme": 成长}') is None
+
+    def test_dump_writes_utf8_bytes(self):
+        """测试写入二进制文件时保留中文"""
+        import io
+        from core.json_utils import dump, loads
+
+        buffer = io.BytesIO()
+        dump({"title": "凡人修仙", "chapters": [1, 2]}, buffer, indent=True)
+
+        assert "凡人修仙".encode("utf-8") in buffer.getvalue()
+        assert loads(buffer.getvalue()) == {"title": "凡人修仙", "chapters": [1, 2]}
+
+    def test_dumps_bytes(self):
+        """测试序列化为UTF-8字节串"""
+        from core.json_utils import dumps_bytes, loads
+
+        data = dumps_bytes({"title": "凡人修仙"}, indent=True)
+
+        assert isinstance(data, bytes)
+        assert "凡人修仙".encode("utf-8") in data
+        assert loads(data) == {"title": "凡人修仙"}
+
+    def test_dumps_dataclass_and_enum(self):
+        """测试序列化数据类与枚举"""
+        from dataclasses import dataclass
+        from enum import Enum
+        from core.json_utils import dumps, loads
+
+        class Level(Enum):
+            FOUNDATION = "筑基期"
+
+        @dataclass
+        class Profile:
+            name: str
+            level: Level
+
+        data = loads(dumps(Profile("韩立", Level.FOUNDATION)))
+
+        assert data == {"name": "韩立", "level": "筑基期"}
+
+    def test_dumps_non_str_keys_and_datetime(self):
+        """测试非字符串键与日期的序列化"""
+        from datetime import datetime
+        from core.json_utils import dumps, loads
+
+        data = loads(dumps({1: "第一章", "saved_at": datetime(2026, 1, 2, 3, 4, 5)}))
+
+        assert data == {"1": "第一章", "saved_at": "2026-01-02T03:04:05"}
+
+
+class TestAsyncRateLimiter:
+    """异步限流器测试"""
+
+    @pytest.mark.asyncio
+    async def test_waits_only_when_tokens_exhausted(self):
+        """测试令牌充足时立即放行，用尽后才等待"""
+        import time
+        from core.rate_limiter import AsyncRateLimiter
+
+        limiter = AsyncRateLimiter(rate=20, capacity=2)
+
+        start = time.monotonic()
+        await limiter.acquire()
+        await limiter.acquire()
+        assert time.monotonic() - start < 0.04
+
+        async with limiter:
+            pass
+        assert time.monotonic() - start >= 0.04
+
+    def test_reusable_across_event_loops(self):
+        """测试同一限流器可在多次 asyncio.run 中使用"""
+        import asyncio
+        from core.rate_limiter import AsyncRateLimiter
+
+        limiter = AsyncRateLimiter(rate=1000, capacity=1)
+
+        async def burst():
+            await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+        asyncio.run(burst())
+        asyncio.run(burst())